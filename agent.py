@@ -2,17 +2,47 @@
 Microsoft AutoGen Multi-Agent System with RAG for report generation
 """
 
+import asyncio
+import threading
+import weakref
 import autogen
-from config import OPENAI_API_KEY
+from autogen import Cache
+from config import get_settings
 from rag_retrieval import retrieve_combined_data, retrieve_sales_data, retrieve_marketing_data
 
+# System messages (the fixed "job description" of each agent).
+# They never change, so they are defined once here. A fixed system message with a fixed model also
+# forms an identical prompt prefix on every call, which OpenAI's automatic prompt caching can reuse.
+_ANALYST_SYSTEM_MSG = """You are a Senior Data Analyst specializing in sales and marketing analytics.
+
+Your responsibilities:
+1. Analyze sales and marketing data provided to you
+2. Identify trends, patterns, and anomalies
+3. Calculate key metrics and KPIs
+4. Provide data-driven insights
+5. Be precise and analytical in your findings
+
+You receive context from a RAG system containing real sales and marketing data.
+Base all your analysis on this retrieved context."""
+
+_WRITER_SYSTEM_MSG = """You are a Professional Report Writer specialized in business reporting.
+
+Your responsibilities:
+1. Take analytical findings and create comprehensive reports
+2. Structure reports with clear sections (Executive Summary, Key Findings, etc.)
+3. Write in a professional, clear, and engaging manner
+4. Provide actionable recommendations
+5. Format reports properly with bullet points and sections
+
+Create reports that executives can easily understand and act upon."""
+
 # Below LLM Configuration will be used in Agent
 def create_autogen_config():
     """Create AutoGen LLM configuration"""
     config_list = [
         {
             "model": "gpt-4.1-nano",
-            "api_key": OPENAI_API_KEY,
+            "api_key": get_settings().openai_api_key,
         }
     ]
 
@@ -20,30 +50,26 @@ def create_autogen_config():
         "config_list": config_list,
         "temperature": 0.7, # For Randomness
         "timeout": 120, # time (in seconds) take AI model to respond
-        "cache_seed": None # It won't use old result
+        "cache_seed": get_settings().autogen_cache_seed # Same prompt + same seed → reuse the cached reply instead of calling the API again
     }
 
     return llm_config
 
+
+# Opens AutoGen's on-disk response cache (a small SQLite store under autogen_cache_path).
+# The analyst and writer both use the same seed, so they share one cache directory.
+def open_llm_cache():
+    """Open the shared AutoGen disk cache"""
+    settings = get_settings()
+    return Cache.disk(cache_seed=settings.autogen_cache_seed, cache_path_root=settings.autogen_cache_path)
+
 # Creating Agent for Data Analysis
 def create_data_analyst_agent():
     """Create a Data Analyst Agent that analyzes data"""
     
-    system_message = """You are a Senior Data Analyst specializing in sales and marketing analytics.
-
-Your responsibilities:
-1. Analyze sales and marketing data provided to you
-2. Identify trends, patterns, and anomalies
-3. Calculate key metrics and KPIs
-4. Provide data-driven insights
-5. Be precise and analytical in your findings
-
-You receive context from a RAG system containing real sales and marketing data.
-Base all your analysis on this retrieved context."""
-    
     analyst = autogen.AssistantAgent(
         name="data_analyst",
-        system_message=system_message,
+        system_message=_ANALYST_SYSTEM_MSG,
         llm_config=create_autogen_config(),
     )
     # it return analyst Agent for Data Analysis
@@ -54,20 +80,9 @@ Base all your analysis on this retrieved context."""
 def create_report_writer_agent():
     """Create a Report Writer Agent that creates professional reports"""
     
-    system_message = """You are a Professional Report Writer specialized in business reporting.
-
-Your responsibilities:
-1. Take analytical findings and create comprehensive reports
-2. Structure reports with clear sections (Executive Summary, Key Findings, etc.)
-3. Write in a professional, clear, and engaging manner
-4. Provide actionable recommendations
-5. Format reports properly with bullet points and sections
-
-Create reports that executives can easily understand and act upon."""
-    
     writer = autogen.AssistantAgent(
         name="report_writer",
-        system_message=system_message,
+        system_message=_WRITER_SYSTEM_MSG,
         llm_config=create_autogen_config(),
     )
     
@@ -89,87 +104,199 @@ def create_user_proxy():
     return user_proxy
 
 
+# Building agents re-parses the config and re-registers reply handlers, so the sync pipeline reuses
+# one set of agents instead of rebuilding them for every report.
+# The set is kept per thread, so reports generated in parallel threads never share a conversation.
+_agent_pool = threading.local()
+
+def get_shared_agents():
+    """Return this thread's reusable (analyst, writer, user_proxy) agents with cleared history"""
+    if not hasattr(_agent_pool, "agents"):
+        _agent_pool.agents = (
+            create_data_analyst_agent(),
+            create_report_writer_agent(),
+            create_user_proxy(),
+        )
+    # reset() clears the previous conversation, so old messages don't leak into (and add tokens to) the new report
+    for agent in _agent_pool.agents:
+        agent.reset()
+    return _agent_pool.agents
+
+
+# Step 1 of every report: pick the right retrieval helper for the report type and fetch the RAG context.
+def retrieve_context_for_report(query, report_type="combined", n_results=8):
+    """Retrieve RAG context for the given report type"""
+    if report_type == "sales":
+        return retrieve_sales_data(query, n_results=n_results)
+    elif report_type == "marketing":
+        return retrieve_marketing_data(query, n_results=n_results)
+    return retrieve_combined_data(query, n_results=n_results)
+
+
+# Prompt layout: the fixed instructions come FIRST and the parts that change (query, data, findings) come LAST.
+# The instructions are the same as before, word for word; only their position changed.
+# OpenAI automatically caches a repeated prompt prefix once it reaches 1024 tokens, but only if the beginning
+# of the prompt is byte-for-byte identical between calls. These prefixes (system message + instructions) are
+# still shorter than that, so today nothing is cached; with the fixed part first, any longer instructions
+# added later will be cached without another reshuffle. Exact repeats are already served by the AutoGen cache.
+
+# Prompt sent to the Data Analyst agent
+def build_analysis_prompt(query, context):
+    """Build the analyst prompt from the query and retrieved context"""
+    return f"""Based on the following data retrieved from our database, please analyze and identify key insights:
+
+Please provide:
+1. Key metrics and numbers
+2. Notable trends
+3. Top performers
+4. Areas of concern
+5. Data-driven insights
+
+Query: {query}
+
+{context}"""
+
+
+# Prompt sent to the Report Writer agent, built from the analyst's findings
+def build_report_prompt(query, analyst_findings):
+    """Build the writer prompt from the analyst's findings"""
+    return f"""Based on the data analyst's findings, create a comprehensive professional report.
+
+Create a detailed report with these sections:
+1. Executive Summary
+2. Key Findings
+3. Detailed Analysis
+4. Insights and Trends
+5. Recommendations
+
+Make it professional, clear, and actionable.
+
+Original Query: {query}
+
+Data Analyst's Findings:
+{analyst_findings}"""
+
+
+# One prompt that asks for both jobs at once: first analyze the data, then write the report.
+def build_fused_report_prompt(query, context):
+    """Build a single analyze-then-write prompt"""
+    return f"""Based on the following data retrieved from our database, first analyze it and then write a comprehensive professional report.
+
+First, analyze the data and identify:
+1. Key metrics and numbers
+2. Notable trends
+3. Top performers
+4. Areas of concern
+5. Data-driven insights
+
+Then, using that analysis, create a detailed report with these sections:
+1. Executive Summary
+2. Key Findings
+3. Detailed Analysis
+4. Insights and Trends
+5. Recommendations
+
+Only output the final report. Make it professional, clear, and actionable.
+
+Query: {query}
+
+{context}"""
+
+
+# Short sales/marketing reports are generated with ONE LLM call instead of two (analyst → writer).
+# The analyst's text was only being passed straight to the writer, so merging both steps into one
+# prompt halves the waiting time and avoids sending the findings back to the model as input.
+# "combined" reports, or reports with more than this many RAG results, keep the two-agent chain for depth.
+FUSED_REPORT_MAX_RESULTS = 8
+
+# True when a report should take the single-pass path — the sync and async pipelines both decide with this.
+def _use_single_pass(report_type, n_results):
+    return report_type != "combined" and n_results <= FUSED_REPORT_MAX_RESULTS
+
+def generate_report_fused(query, report_type="combined", n_results=8, prefetched_context=None):
+    """Generate a report with a single analyze-and-write LLM call"""
+    print("\n[AutoGen] Starting Single-Pass Analysis...")
+
+    context = prefetched_context
+    if context is None:
+        context = retrieve_context_for_report(query, report_type, n_results)
+    analyst, _, user_proxy = get_shared_agents()
+
+    print("[AutoGen] Data Analyst - Analyzing data and writing report...")
+    with open_llm_cache() as cache:
+        user_proxy.initiate_chat(
+            analyst,
+            message=build_fused_report_prompt(query, context),
+            max_turns=1,
+            cache=cache
+        )
+
+    final_report = user_proxy.last_message(analyst)["content"]
+    print("[AutoGen] Report Generation Complete!\n")
+    return final_report
+
+
 # This function automates a data analysis + report generation process.
 # query: what you want to analyze (e.g. “monthly sales trends”)
 # report_type → choose "sales", "marketing", or "combined"
 # n_results → how many pieces of data to retrieve (default = 8)
-def generate_report_with_autogen_multiagent(query, report_type="combined", n_results=8):
+# prefetched_context → context already retrieved (e.g. by a batched retrieval); skips the RAG step
+def generate_report_with_autogen_multiagent(query, report_type="combined", n_results=8, prefetched_context=None):
     """Generate report using multi-agent AutoGen system with RAG"""
     
+    # Short, single-topic reports don't need the two-hop chain
+    if _use_single_pass(report_type, n_results):
+        return generate_report_fused(query, report_type, n_results, prefetched_context)
+
     print("\n[AutoGen] Starting Multi-Agent Analysis...")
     
     # Step 1: Retrieve relevant context using RAG
-    if report_type == "sales":
-        context = retrieve_sales_data(query, n_results=n_results)
-    elif report_type == "marketing":
-        context = retrieve_marketing_data(query, n_results=n_results)
-    else:
-        context = retrieve_combined_data(query, n_results=n_results)
+    context = prefetched_context
+    if context is None:
+        context = retrieve_context_for_report(query, report_type, n_results)
     
-    # Step 2: Create agents
+    # Step 2: Get agents (reused between reports, history cleared)
     # analyst → analyzes data
     # writer → writes the report
     # user_proxy → acts as the go-between for communication
-    analyst = create_data_analyst_agent()
-    writer = create_report_writer_agent()
-    user_proxy = create_user_proxy()
+    analyst, writer, user_proxy = get_shared_agents()
     
     # Step 3: First, have analyst analyze the data
-    analysis_prompt = f"""Based on the following data retrieved from our database, please analyze and identify key insights:
-
-Query: {query}
-
-{context}
-
-Please provide:
-1. Key metrics and numbers
-2. Notable trends
-3. Top performers
-4. Areas of concern
-5. Data-driven insights"""
+    analysis_prompt = build_analysis_prompt(query, context)
     
     print("[AutoGen] Agent 1 (Data Analyst) - Analyzing data...")
     
     # Analyst analyzes the data.
     # The user proxy starts a chat with the analyst agent and sends the analysis prompt.
     # max_turns=1 → means only 1 exchange happens (no long back-and-forth)
-    user_proxy.initiate_chat(
-        analyst,
-        message=analysis_prompt,
-        max_turns=1
-    )
+    # cache → if this exact prompt was answered before, the stored reply is returned without calling the API
+    with open_llm_cache() as cache:
+        user_proxy.initiate_chat(
+            analyst,
+            message=analysis_prompt,
+            max_turns=1,
+            cache=cache
+        )
     
     # Get analyst's findings
     # Retrieves the final message (response) from the analyst agent — the analysis results.
     analyst_findings = user_proxy.last_message(analyst)["content"]
     
     # Step 4: Have writer create comprehensive report from analyst's findings
-    report_prompt = f"""Based on the data analyst's findings, create a comprehensive professional report.
-
-Original Query: {query}
-
-Data Analyst's Findings:
-{analyst_findings}
-
-Create a detailed report with these sections:
-1. Executive Summary
-2. Key Findings  
-3. Detailed Analysis
-4. Insights and Trends
-5. Recommendations
-
-Make it professional, clear, and actionable."""
+    report_prompt = build_report_prompt(query, analyst_findings)
     
     print("[AutoGen] Agent 2 (Report Writer) - Creating report...")
     
     # Writer creates the report
     # The user proxy now talks to the writer agent, giving it the analyst’s findings to convert into a well-formatted report.
     # max_turns=1 → means only 1 exchange happens (no long back-and-forth)
-    user_proxy.initiate_chat(
-        writer,
-        message=report_prompt,
-        max_turns=1
-    )
+    with open_llm_cache() as cache:
+        user_proxy.initiate_chat(
+            writer,
+            message=report_prompt,
+            max_turns=1,
+            cache=cache
+        )
     
     # Get final report
     final_report = user_proxy.last_message(writer)["content"]
@@ -180,28 +307,119 @@ Make it professional, clear, and actionable."""
     return final_report
 
 
+# Async version of generate_report_with_autogen_multiagent.
+# It takes the same route (single pass for short sales/marketing reports, analyst → writer otherwise),
+# but uses AutoGen's a_initiate_chat, so while one report is waiting for the OpenAI API,
+# other reports can run at the same time.
+# The RAG step (embedding + ChromaDB) is blocking, so it runs in a worker thread instead of on the event loop.
+# Each call creates its own agents: all reports share one event loop thread, so the per-thread pool can't keep them apart.
+async def _a_run_multiagent_pipeline(query, report_type, n_results):
+    context = await asyncio.to_thread(retrieve_context_for_report, query, report_type, n_results)
+
+    analyst = create_data_analyst_agent()
+    user_proxy = create_user_proxy()
+
+    if _use_single_pass(report_type, n_results):
+        print(f"[AutoGen] Data Analyst - Analyzing and writing: {query}")
+        with open_llm_cache() as cache:
+            await user_proxy.a_initiate_chat(
+                analyst,
+                message=build_fused_report_prompt(query, context),
+                max_turns=1,
+                cache=cache
+            )
+        return user_proxy.last_message(analyst)["content"]
+
+    writer = create_report_writer_agent()
+
+    print(f"[AutoGen] Data Analyst - Analyzing: {query}")
+    with open_llm_cache() as cache:
+        await user_proxy.a_initiate_chat(
+            analyst,
+            message=build_analysis_prompt(query, context),
+            max_turns=1,
+            cache=cache
+        )
+    analyst_findings = user_proxy.last_message(analyst)["content"]
+
+    print(f"[AutoGen] Report Writer - Writing: {query}")
+    with open_llm_cache() as cache:
+        await user_proxy.a_initiate_chat(
+            writer,
+            message=build_report_prompt(query, analyst_findings),
+            max_turns=1,
+            cache=cache
+        )
+    return user_proxy.last_message(writer)["content"]
+
+
+# Reports currently being generated, keyed by (query, report_type, n_results).
+# If the same report is requested again while the first one is still running (dashboard refresh, retry loop),
+# the second caller simply waits for the first one's result — only one pipeline runs, and no extra API cost.
+# There is one map per event loop: run_reports_batch starts a new loop with every asyncio.run, and a task
+# left over from an interrupted run belongs to a closed loop, so it must never be awaited from the next one.
+# The loop is held weakly, so its map goes away with it.
+# No lock is needed: everything in one map runs on one event loop, and there is no await between checking and
+# inserting a key, so two coroutines can never both start the same report.
+_inflight = weakref.WeakKeyDictionary()
+
+async def a_generate_report_with_autogen_multiagent(query, report_type="combined", n_results=8):
+    """Async multi-agent report generation"""
+    inflight = _inflight.setdefault(asyncio.get_running_loop(), {})
+    key = (query, report_type, n_results)
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_a_run_multiagent_pipeline(query, report_type, n_results))
+        inflight[key] = task
+        # Remove the entry once it finishes, so later requests run fresh (completed results are served by the caches)
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    # shield → if one waiting caller is cancelled, the shared report keeps running for the others
+    return await asyncio.shield(task)
+
+
+# Runs many reports concurrently.
+# queries → list of (query, report_type, n_results) tuples
+# max_concurrency → how many reports may talk to the OpenAI API at the same time (keeps us under the rate limit)
+# Returns the reports in the same order as the queries.
+async def generate_reports_batch(queries, max_concurrency=8):
+    """Generate several reports concurrently"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(query, report_type, n_results):
+        async with semaphore:
+            return await a_generate_report_with_autogen_multiagent(query, report_type, n_results)
+
+    return await asyncio.gather(*[run_one(q, t, n) for q, t, n in queries])
+
+
+# Regular (non-async) entry point for the batch runner, for callers that are not inside an event loop.
+def run_reports_batch(queries, max_concurrency=8):
+    """Synchronous wrapper around generate_reports_batch"""
+    return asyncio.run(generate_reports_batch(queries, max_concurrency))
+
+
 # This function doesn’t do any new work.
 # It just redirects the call to your newer function.
 # If anyone still calls the old function name, just run the new one instead
-def generate_report_with_rag(query, report_type="combined", n_results=5):
+def generate_report_with_rag(query, report_type="combined", n_results=5, prefetched_context=None):
     """Wrapper function for backward compatibility"""
-    return generate_report_with_autogen_multiagent(query, report_type, n_results)
+    return generate_report_with_autogen_multiagent(query, report_type, n_results, prefetched_context)
 
 
 # You provide the full question + context yourself, and it returns the AI’s answer — no RAG fetching, no writer agent involved.
 # prompt_with_context → This is a full text prompt that already includes the question and data/context the agent should analyze.
 def generate_custom_report(prompt_with_context):
     """Generate custom report with pre-formatted prompt"""
-    analyst = create_data_analyst_agent()
-    user_proxy = create_user_proxy()
+    analyst, _, user_proxy = get_shared_agents()
     
-    user_proxy.initiate_chat(analyst, message=prompt_with_context, max_turns=1)
+    with open_llm_cache() as cache:
+        user_proxy.initiate_chat(analyst, message=prompt_with_context, max_turns=1, cache=cache)
     return user_proxy.last_message()["content"]
 
 
 if __name__ == "__main__": # --> Means Only run the following code if this file is executed directly (not imported as a module)
     # Test the multi-agent system
-    if OPENAI_API_KEY:
+    if get_settings().openai_api_key:
         print("="*80)
         print("Testing Microsoft AutoGen Multi-Agent System with RAG")
         print("="*80)
@@ -3,39 +3,110 @@ Configuration file for the report generation system
 """
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# EuriAPI Configuration
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 
-# ChromaDB Configuration
-CHROMA_DB_PATH = "./chroma_db"
-COLLECTION_NAME = "sales_marketing_data"
+# All settings live in one read-only (frozen) object.
+# frozen=True → nobody can change a value by accident, so threads can share it safely without locks.
+# slots=True → no per-instance __dict__, a little lighter in memory.
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Application settings"""
 
-# AutoGen Configuration
-AUTOGEN_CONFIG = {
-    "config_list": [
-        {
-            "model": "gpt-4.1-nano",
-            "api_key": OPENAI_API_KEY,
-        }
-    ],
-    "temperature": 0.7,
-}
+    # EuriAPI Configuration
+    openai_api_key: str
+
+    # ChromaDB Configuration
+    chroma_db_path: str
+    collection_name: str
+    # Retrieved documents with a relevance score (cosine similarity to the query) below this are not sent to the LLM.
+    # The best match is always kept, so the analyst never gets an empty context.
+    min_relevance: float
+    retrieval_cache_ttl: int  # seconds a cached retrieval result (exact-match or semantic) is reused before ChromaDB is asked again
+
+    # AutoGen response cache
+    # A fixed cache_seed lets AutoGen reuse the stored LLM reply when the exact same prompt is sent again
+    # (e.g. the daily scheduled report on unchanged data). Entries never expire on their own —
+    # delete the autogen_cache_path folder (or change the seed) to force fresh answers.
+    autogen_cache_seed: int
+    autogen_cache_path: str
+
+    # Email Configuration
+    gmail_user: str
+    gmail_app_password: str
+    recipient_email: str
+
+    # Scheduler Configuration
+    schedule_time: str
+    timezone: str
 
-# Email Configuration
-GMAIL_USER = os.getenv("GMAIL_USER", "")
-GMAIL_APP_PASSWORD = os.getenv("GMAIL_APP_PASSWORD", "")
-RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL", "")
+    # Telegram Configuration
+    telegram_api_id: int
+    telegram_api_hash: str
+    telegram_phone: str
 
-# Scheduler Configuration
-SCHEDULE_TIME = "09:00"  # 9 AM IST
-TIMEZONE = "Asia/Kolkata"
 
-# Telegram Configuration
-TELEGRAM_API_ID = int(os.getenv("TELEGRAM_API_ID", "24432442"))
-TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH", "044164fe66bdef2f12afea57213ec4f3")
-TELEGRAM_PHONE = os.getenv("TELEGRAM_PHONE", "+919667959361")
\ No newline at end of file
+# Reads the environment only once — the first call builds Settings, every later call returns the same object.
+@lru_cache(maxsize=1)
+def get_settings():
+    """Return the application settings"""
+    return Settings(
+        openai_api_key=os.getenv("OPENAI_API_KEY", "").strip(),
+        chroma_db_path="./chroma_db",
+        collection_name="sales_marketing_data",
+        min_relevance=float(os.getenv("MIN_RELEVANCE", "0.3")),
+        retrieval_cache_ttl=int(os.getenv("RETRIEVAL_CACHE_TTL", "3600")),
+        autogen_cache_seed=int(os.getenv("AUTOGEN_CACHE_SEED", "42")),
+        autogen_cache_path="./.autogen_cache",
+        gmail_user=os.getenv("GMAIL_USER", ""),
+        gmail_app_password=os.getenv("GMAIL_APP_PASSWORD", ""),
+        recipient_email=os.getenv("RECIPIENT_EMAIL", ""),
+        schedule_time="09:00",  # 9 AM IST
+        timezone="Asia/Kolkata",
+        telegram_api_id=int(os.getenv("TELEGRAM_API_ID", "24432442")),
+        telegram_api_hash=os.getenv("TELEGRAM_API_HASH", "044164fe66bdef2f12afea57213ec4f3"),
+        telegram_phone=os.getenv("TELEGRAM_PHONE", "+919667959361"),
+    )
+
+
+# Old-style constants (from config import GMAIL_USER, ...) still work.
+# They are looked up in Settings only when someone actually imports them.
+_LEGACY_NAMES = {
+    "OPENAI_API_KEY": "openai_api_key",
+    "CHROMA_DB_PATH": "chroma_db_path",
+    "COLLECTION_NAME": "collection_name",
+    "MIN_RELEVANCE": "min_relevance",
+    "RETRIEVAL_CACHE_TTL": "retrieval_cache_ttl",
+    "AUTOGEN_CACHE_SEED": "autogen_cache_seed",
+    "AUTOGEN_CACHE_PATH": "autogen_cache_path",
+    "GMAIL_USER": "gmail_user",
+    "GMAIL_APP_PASSWORD": "gmail_app_password",
+    "RECIPIENT_EMAIL": "recipient_email",
+    "SCHEDULE_TIME": "schedule_time",
+    "TIMEZONE": "timezone",
+    "TELEGRAM_API_ID": "telegram_api_id",
+    "TELEGRAM_API_HASH": "telegram_api_hash",
+    "TELEGRAM_PHONE": "telegram_phone",
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_NAMES:
+        return getattr(get_settings(), _LEGACY_NAMES[name])
+    if name == "AUTOGEN_CONFIG":
+        # AutoGen Configuration
+        return {
+            "config_list": [
+                {
+                    "model": "gpt-4.1-nano",
+                    "api_key": get_settings().openai_api_key,
+                }
+            ],
+            "temperature": 0.7,
+        }
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
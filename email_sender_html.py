@@ -3,14 +3,212 @@ Enhanced email sending with HTML templates and embedded images
 """
 
 import smtplib
+import threading
+import atexit
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from email.mime.image import MIMEImage
 from datetime import datetime
-from config import GMAIL_USER, GMAIL_APP_PASSWORD, RECIPIENT_EMAIL
+from config import get_settings
 from html_email_template import create_html_email
 import os
+import copy
+import mmap
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Chart file → Content-ID used by the HTML template (<img src="cid:sales_by_region">)
+CHART_CID_MAP = {
+    'sales_by_region.png': 'sales_by_region',
+    'quarterly_performance.png': 'quarterly_performance',
+    'product_performance.png': 'product_performance',
+    'marketing_roi.png': 'marketing_roi',
+    'channel_performance.png': 'channel_performance'
+}
+
+# Fixed parts of the plain text (fallback) body; only the report list in the middle changes per email
+PLAIN_TEXT_HEADER = """Daily Sales & Marketing Report - {today}
+Hello,
+
+Please find attached your daily sales and marketing report with comprehensive visualization.
+
+Report included:
+"""
+PLAIN_TEXT_FOOTER = """
+Best Regards,
+Automated Report System
+"""
+
+# The HTML template only depends on the date, so it is rendered once per day and reused for every send.
+@lru_cache(maxsize=1)
+def _html_body_for(today):
+    return create_html_email({})
+
+# Reads a single file as raw bytes ('rb' = “read binary”).
+# The file is memory-mapped, so the OS pages it straight in and Python makes a single copy of the
+# contents (MIME still needs real bytes for base64 encoding). Empty files can't be mapped → b"".
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return path, b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return path, bytes(mm)
+
+# Reads the given files at once and returns [(path, bytes), ...] in the same order.
+# Every path must exist: a missing file raises OSError.
+# Reading files is I/O — threads can wait on several disk reads at the same time, so this is faster than one by one.
+def _read_files(paths, max_workers=8):
+    if not paths:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(_read_bytes, paths))
+
+# Reads all the given files at once and returns [(path, bytes), ...] for the ones that exist.
+# os.stat is called once per path to skip missing files (instead of exists() + open()).
+def read_existing_files(paths, max_workers=8):
+    """Read all existing files concurrently"""
+    existing = []
+    for path in paths:
+        try:
+            os.stat(path)
+        except OSError:
+            continue  # If the file doesn’t exist, just skip it to avoid errors.
+        existing.append(path)
+
+    return _read_files(existing, max_workers)
+
+# Already-encoded MIME parts from earlier emails, keyed by file path.
+# Each entry remembers the file's (mtime, size); if the file changed, the part is rebuilt.
+# The daily job attaches the same charts every time, so this skips both the file read and the base64 encoding.
+_MIME_CACHE_SIZE = 32
+_mime_cache = OrderedDict()
+_mime_cache_lock = threading.Lock()
+
+def _make_image_part(data):
+    return MIMEImage(data)
+
+def _make_report_part(data):
+    # _subtype="txt" tells the email that this file is a text file.
+    return MIMEApplication(data, _subtype="txt")
+
+# Returns [(path, part), ...] for every existing file, in the same order as paths.
+# make_part turns raw bytes into a MIME part (image or report). Files not in the cache (or changed on disk)
+# are read concurrently and encoded; cached ones are copied so each email can get its own headers.
+# Each file is stat-ed once, here. A file deleted after that raises OSError instead of quietly
+# missing from the email.
+def load_mime_parts(paths, make_part):
+    """Build (or reuse) MIME parts for the given files"""
+    stamps = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # If the file doesn’t exist, just skip it to avoid errors.
+        stamps[path] = (make_part.__name__, st.st_mtime, st.st_size)
+
+    parts = {}
+    with _mime_cache_lock:
+        for path, stamp in stamps.items():
+            key = os.path.abspath(path)
+            entry = _mime_cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                _mime_cache.move_to_end(key) # mark as recently used
+                parts[path] = entry[1]
+
+    for path, data in _read_files([path for path in stamps if path not in parts]):
+        parts[path] = make_part(data)
+        with _mime_cache_lock:
+            _mime_cache[os.path.abspath(path)] = (stamps[path], parts[path])
+            while len(_mime_cache) > _MIME_CACHE_SIZE:
+                _mime_cache.popitem(last=False)
+
+    # deepcopy → the cached part stays clean; headers added by the caller only go on this email's copy
+    return [(path, copy.deepcopy(parts[path])) for path in stamps]
+
+# One shared, logged-in Gmail connection for the whole process.
+# The lock makes sure two threads never use (or replace) the connection at the same time.
+_smtp_lock = threading.Lock()
+_smtp = None
+
+def _connect_smtp():
+    settings = get_settings()
+    # This line removes any spaces from your Gmail App Password before using it to log in.
+    app_password = settings.gmail_app_password.replace(" ", "")
+
+    # This section connects your Python program to Gmail’s mail server securely — so that it can send emails.
+    print("\nConnecting to Gmail SMTP server...")
+
+    # This line creates a connection to Gmail’s email sending server.
+    # smtplib.SMTP → is a built-in Python library for sending emails using the SMTP protocol (Simple Mail Transfer Protocol — how emails are sent over the internet).
+    # 'smtp.gmail.com' → is Gmail’s SMTP server address (where your email gets sent from).
+    # 587 → is the port number used for TLS encryption (a secure connection).
+    # the variable server now represents your active connection to Gmail’s SMTP service.
+    server = smtplib.SMTP('smtp.gmail.com', 587)
+
+    # This line upgrades your connection to be secure and encrypted using TLS (Transport Layer Security).
+    # It makes sure your email and password are not sent in plain text over the internet.
+    server.starttls()
+
+    # This section logs in to your Gmail account using your email address and app password, so the program can send emails from your account.
+    print("Logging in...")
+    # It sends your email and app password securely to Gmail’s SMTP server (since we already did starttls() earlier, the connection is encrypted).
+    # If credentials are correct: Gmail allows your program to send emails from your account.
+    # If something’s wrong: Gmail will reject the login and you’ll get an error like smtplib.SMTPAuthenticationError.
+    server.login(settings.gmail_user, app_password)
+    return server
+
+# Closes the dead connection's socket and forgets it, so the next _get_smtp() opens a new one.
+# Must be called with _smtp_lock held.
+def _discard_smtp():
+    global _smtp
+    if _smtp is not None:
+        _smtp.close()
+        _smtp = None
+
+# Returns the open connection, or opens a new one if there is none or Gmail has closed it.
+# NOOP is a tiny "are you still there?" command — status 250 means the connection is alive.
+# Must be called with _smtp_lock held.
+def _get_smtp():
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _discard_smtp()
+    _smtp = _connect_smtp()
+    return _smtp
+
+# Sends msg (the complete email with subject, sender and receiver info, text and HTML versions, attached files, embedded images).
+# If Gmail dropped the connection between the liveness check and the send, reconnect once and try again.
+# Only SMTPServerDisconnected is retried: any other SMTP error (refused recipient, rejected data, timeout ...)
+# may come after Gmail already accepted the message, so sending it again could deliver the report twice.
+def send_via_smtp(msg):
+    """Send a message over the shared Gmail SMTP connection"""
+    with _smtp_lock:
+        server = _get_smtp()
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            _discard_smtp()
+            _get_smtp().send_message(msg)
+
+# Ends the connection with Gmail’s mail server when the program exits.
+@atexit.register
+def close_smtp():
+    """Close the shared SMTP connection"""
+    global _smtp
+    with _smtp_lock:
+        if _smtp is not None:
+            try:
+                _smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            _smtp = None
 
 # This is the main function that creates and sends the email
 # report_files: a list of text report files (like ["sales_report.txt"])
@@ -18,11 +216,12 @@ import os
 
 def send_html_email_with_charts(report_files, chart_files):
     """Send beautiful HTML email with embedded charts and report attachments"""
+    settings = get_settings()
 
-    # If your Gmail ID or App Password is not set in the config.py file, the script stops.
+    # If your Gmail ID or App Password is not set in the config.py settings, the script stops.
     # This ensures security — it won’t try to send an email without valid credentials
 
-    if not GMAIL_USER or not GMAIL_APP_PASSWORD:
+    if not settings.gmail_user or not settings.gmail_app_password:
         print("Error: Email credential not configured!")
         return False
     
@@ -35,8 +234,8 @@ def send_html_email_with_charts(report_files, chart_files):
         # Create Message
         # It sets the sender, receiver, and subject line
         msg = MIMEMultipart('related') # 'related' means this email can contain HTML + images + attachments
-        msg['From'] = GMAIL_USER
-        msg['To'] = RECIPIENT_EMAIL
+        msg['From'] = settings.gmail_user
+        msg['To'] = settings.recipient_email
         msg['Subject'] = subject
 
         # Create alternative part for HTML
@@ -47,144 +246,77 @@ def send_html_email_with_charts(report_files, chart_files):
         msg.attach(msg_alternative)
 
         # Plain text version (fallback)
-        text_body = f"""Daily Sales & Marketing Report - {today}
-Hello,
-
-Please find attached your daily sales and marketing report with comprehensive visualization.
-
-Report included:
-"""
-        for report_file in report_files:
-            text_body +=f"- {os.path.basename(report_file)}\n"
-        
-        text_body += """
-Best Regards,
-Automated Report System
-"""
+        # One line per report file, joined once instead of growing the string in a loop
+        report_list = "".join(f"- {os.path.basename(report_file)}\n" for report_file in report_files)
+        text_body = PLAIN_TEXT_HEADER.format(today=today) + report_list + PLAIN_TEXT_FOOTER
         msg_alternative.attach(MIMEText(text_body, 'plain'))
 
         # HTML version with Chart.
         # create_html_email({}) is to make a nice, styled HTML layout with chats and text.
-        html_body = create_html_email({})
+        html_body = _html_body_for(today)
         msg_alternative.attach(MIMEText(html_body, 'html'))
 
         # Embed charts images.
-        chart_mapping = {
-            'sales_by_region.png': 'sales_by_region',
-            'quarterly_performance.png': 'quarterly_performance',
-            'product_performance.png': 'product_performance',
-            'marketing_roi.png': 'marketing_roi',
-            'channel_performance.png': 'channel_performance'
-        }
-
-        # This goes through each image file (like sales_by_region.png, marketing_roi.png, etc.) in the list called chart_files
-        for chart_file in chart_files:
-
-            # This checks whether the image file actually exists on your computer before trying to use it.
-            # If the file doesn’t exist, it just skips it to avoid errors.
-            if os.path.exists(chart_file):
-
-                # This extracts only the file name from the full path.
-                # Example: 
-                # if file path is: C:/Reports/Charts/sales_by_region.png then filename becomes "sales_by_region.png"
-                filename = os.path.basename(chart_file)
-
-                # This opens the image file in binary mode ('rb' means “read binary”) so Python can read the raw bytes (not text).
-                # Images are not text files, so you need to read them as bytes
-                with open(chart_file, 'rb') as f:
-
-                    # This reads the image data and wraps it in a MIMEImage object.
-                    # This special object tells the email system: "Hey, this is an image that can be shown inside the email."
-                    # So now, img represents one image ready to attach
-                    img = MIMEImage(f.read())
-
-                    # This creates a Content ID (CID) for the image.
-                    # A CID is like a unique name that lets the HTML part of the email display the image inline.
-                    # Example:
-                    # If filename = "sales_by_region.png", then it looks for "sales_by_region.png" in the chart_mapping dictionary.
-                    # If it finds a match, cid will be "sales_by_region"
-                    # If not, it will just use the filename without .png
-                    cid = chart_mapping.get(filename, filename.replace('.png', ''))
-
-                    # This adds a header to the image telling the email client: "This image’s unique ID is <sales_by_region>."
-                    # Later, in HTML template, ywe can refer to this image like this: <img src="cid:sales_by_region">
-                    img.add_header('Content-ID', f'<{cid}>')
-
-                    # This says the image should be shown inline (inside the message) — not just attached as a downloadable file.
-                    img.add_header('Content-Disposition', 'inline', filename=filename)
-
-                    # Finally, this adds the image to the email message (msg) so that it gets sent along with the email.
-                    msg.attach(img)
-                print(f"✓ Embedded chart: {filename}")
-        
 
-        # Attach report files.
-        # This part’s goal is to attach report files (like .txt files or other documents) to the email so the receiver can download them.
+        # Build the MIME parts for every chart image and every report file.
+        # Files that changed (or were never sent) are read in one concurrent pass; the rest come from the cache.
+        chart_parts = load_mime_parts(chart_files, _make_image_part)
+        report_parts = load_mime_parts(report_files, _make_report_part)
+
+        # This goes through each image (like sales_by_region.png, marketing_roi.png, etc.) that was found on disk
+        for chart_file, img in chart_parts:
 
-        # This goes through every report file in your list.
-        for report_file in report_files:
+            # This extracts only the file name from the full path.
+            # Example:
+            # if file path is: C:/Reports/Charts/sales_by_region.png then filename becomes "sales_by_region.png"
+            filename = os.path.basename(chart_file)
 
-            # This checks if that report file actually exists on your computer.
-            # If it’s missing, Python skips it to avoid an error.
-            if os.path.exists(report_file):
+            # img is a MIMEImage object.
+            # This special object tells the email system: "Hey, this is an image that can be shown inside the email."
 
-                # This opens the report file in binary mode ('rb' = “read binary”).
-                # Even though it’s a text file, we open it in binary mode because emails handle attachments as raw bytes, not normal text.
-                with open(report_file, 'rb') as f:
+            # This creates a Content ID (CID) for the image.
+            # A CID is like a unique name that lets the HTML part of the email display the image inline.
+            # Example:
+            # If filename = "sales_by_region.png", then it looks for "sales_by_region.png" in the CHART_CID_MAP dictionary.
+            # If it finds a match, cid will be "sales_by_region"
+            # If not, it will just use the filename without its extension
+            cid = CHART_CID_MAP.get(filename, os.path.splitext(filename)[0])
 
-                    # f.read() reads the file’s contents (the entire report).
-                    # MIMEApplication(...) wraps that data in a special email-friendly format called a MIME attachment.
-                    # _subtype="txt" tells the email that this file is a text file.
-                    attach = MIMEApplication(f.read(), _subtype= "txt")
+            # This adds a header to the image telling the email client: "This image’s unique ID is <sales_by_region>."
+            # Later, in HTML template, ywe can refer to this image like this: <img src="cid:sales_by_region">
+            img.add_header('Content-ID', f'<{cid}>')
 
-                    # This adds a header that tells email clients (like Gmail or Outlook):
-                    # 1. “This is an attachment, not inline content.”
-                    # “And when the user downloads it, show the filename like demo_sales.txt.”
-                    # os.path.basename(report_file) just extracts the filename (without the folder path)
-                    attach.add_header('Content-Disposition', 'attachment', filename=os.path.basename(report_file))
+            # This says the image should be shown inline (inside the message) — not just attached as a downloadable file.
+            img.add_header('Content-Disposition', 'inline', filename=filename)
 
-                    # Now that the attachment is ready, this line actually adds it to the email message object (msg)
-                    # So, when the email is sent, the recipient will see it as a downloadable attachment.
-                    msg.attach(attach)
-                print(f"✓ Attached report: {os.path.basename(report_file)}")
+            # Finally, this adds the image to the email message (msg) so that it gets sent along with the email.
+            msg.attach(img)
+            print(f"✓ Embedded chart: {filename}")
         
-        # Send email via Gmail SMTP
-        # This line removes any spaces from your Gmail App Password before using it to log in.
-        app_password = GMAIL_APP_PASSWORD.replace(" ", "")
-
-        # This section connects your Python program to Gmail’s mail server securely — so that it can send emails.
-        print("\nConnecting to Gmail SMTP server...")
-
-        # This line creates a connection to Gmail’s email sending server.
-        # smtplib.SMTP → is a built-in Python library for sending emails using the SMTP protocol (Simple Mail Transfer Protocol — how emails are sent over the internet).
-        # 'smtp.gmail.com' → is Gmail’s SMTP server address (where your email gets sent from).
-        # 587 → is the port number used for TLS encryption (a secure connection).
-        # the variable server now represents your active connection to Gmail’s SMTP service.
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-
-        # This line upgrades your connection to be secure and encrypted using TLS (Transport Layer Security).
-        # It makes sure your email and password are not sent in plain text over the internet.
-        server.starttls()
-
-        # This section logs in to your Gmail account using your email address and app password, so the program can send emails from your account.
-        print("Logging in...")
-        # It sends your email and app password securely to Gmail’s SMTP server (since we already did starttls() earlier, the connection is encrypted).
-        # If credentials are correct: Gmail allows your program to send emails from your account.
-        # If something’s wrong: Gmail will reject the login and you’ll get an error like smtplib.SMTPAuthenticationError.
-        server.login(GMAIL_USER, app_password)
 
+        # Attach report files.
+        # This part’s goal is to attach report files (like .txt files or other documents) to the email so the receiver can download them.
+        # Even though they are text files, they were read in binary mode because emails handle attachments as raw bytes, not normal text.
+        # attach is a MIMEApplication — the report's contents in a special email-friendly format called a MIME attachment.
+        for report_file, attach in report_parts:
+
+            # This adds a header that tells email clients (like Gmail or Outlook):
+            # 1. “This is an attachment, not inline content.”
+            # “And when the user downloads it, show the filename like demo_sales.txt.”
+            # os.path.basename(report_file) just extracts the filename (without the folder path)
+            attach.add_header('Content-Disposition', 'attachment', filename=os.path.basename(report_file))
+
+            # Now that the attachment is ready, this line actually adds it to the email message object (msg)
+            # So, when the email is sent, the recipient will see it as a downloadable attachment.
+            msg.attach(attach)
+            print(f"✓ Attached report: {os.path.basename(report_file)}")
+        
+        # Send email via Gmail SMTP
+        # The logged-in connection is kept open between emails, so only the first send pays for the TLS handshake + login.
         print("Sending beautiful HTML email...")
+        send_via_smtp(msg)
 
-        # This line does the real email sending.
-        # server → This is your SMTP connection.
-        # .send_message(...) → This method sends the email.
-        # msg → This is the complete email you built earlier(with subject, sender and receiver info, text and HTML versions, attached files, embedded images).
-        server.send_message(msg)
-
-        # This command ends the connection with Gmail’s mail server.
-        server.quit()
-
-        print(f"\n✓ Beautiful HTML email sent successfully to {RECIPIENT_EMAIL}!")
+        print(f"\n✓ Beautiful HTML email sent successfully to {settings.recipient_email}!")
         return True
     
     # This line catches any error (called an exception) that happens in the try block above.
@@ -2,29 +2,110 @@
 RAG (Retrieval Augmented Generation) functions for report generation
 """
 
-from vector_db import query_vectordb, initialize_chromadb
+import os
+import time
+import inspect
+import threading
+from collections import ChainMap, OrderedDict, defaultdict, namedtuple
+from functools import wraps
+from config import get_settings
+from vector_db import query_vectordb, query_vectordb_batch, initialize_chromadb, reset_chromadb, embed_query, embed_queries, distance_to_relevance, STALE_COLLECTION_ERRORS
+from semantic_cache import SemanticCache, query_slots
+from shared_cache import SharedRetrievalCache
+
+# Recent retrievals keyed by query meaning — near-paraphrases of a recent query reuse its results.
+# Entries expire after retrieval_cache_ttl seconds, like the exact-match caches, and loading new data
+# into ChromaDB empties the cache and deletes the saved files (see clear_retrieval_caches).
+_semantic_cache = SemanticCache(threshold=0.95, maxsize=256, n_tables=8, n_bits=16, ttl=get_settings().retrieval_cache_ttl)
+
+# The scheduler saves the cache next to the ChromaDB files (semantic_cache.npz + semantic_cache.json)
+# and loads it again on the next start, so the daily run (whose queries barely change) skips the vector search.
+# Importing this module never touches these files; only the scheduler's entry points call the two functions below.
+SEMANTIC_CACHE_PATH = os.path.join(get_settings().chroma_db_path, "semantic_cache")
+
+def load_semantic_cache():
+    """Load the semantic cache saved by save_semantic_cache()"""
+    _semantic_cache.load(SEMANTIC_CACHE_PATH)
+
+def save_semantic_cache():
+    """Save the semantic cache next to the ChromaDB files"""
+    try:
+        _semantic_cache.save(SEMANTIC_CACHE_PATH)
+    except OSError as e:
+        print(f"Could not save semantic cache: {e}")
+
+# Query text → its embedding, shared by every thread in the process.
+# When several reports (running in parallel threads) ask with the same query text, the embedding
+# model runs only once: the first thread computes it and the others wait for that result
+# (even when they all ask at the same moment), then take the vector from here.
+_embedding_cache = SharedRetrievalCache(maxsize=256)
+
+def _embed(query):
+    return _embedding_cache.get_or_compute(query, embed_query)
+
+# Same as _embed for a list of queries: only the texts not cached (or being embedded) yet are sent to the model, in one batch.
+def _embed_many(queries):
+    return _embedding_cache.get_or_compute_many(queries, embed_queries)
+
+# Opening ChromaDB (client + collection) is slow, so initialize_chromadb() does it once per process
+# and hands back the same handle on every later call (a forked worker process opens its own).
+def get_collection():
+    """Return the open ChromaDB collection for this process"""
+    _, collection = initialize_chromadb()
+    return collection
+
+# Runs search(collection) on the open collection.
+# If the handle has gone stale (e.g. the collection was deleted and re-created), it is re-opened once
+# and the search is tried again; every other error is raised straight away.
+def _search_collection(search):
+    try:
+        return search(get_collection())
+    except STALE_COLLECTION_ERRORS:
+        reset_chromadb()
+        return search(get_collection())
+
+# Report type → metadata type to search ("combined" or anything else → search everything)
+REPORT_TYPE_FILTERS = {"sales": "sales", "marketing": "marketing"}
+
+def _filter_for(filter_type):
+    return {"type": {"$eq": filter_type}} if filter_type else None
+
+# What a semantic cache hit must match exactly besides the meaning of the query.
+# The slot values (see semantic_cache.query_slots) stop "... in North America" from reusing the
+# results of "... in Europe": the two embeddings are nearly the same, the documents they need are not.
+def _cache_scope(query, filter_type, n_results):
+    return (filter_type, n_results, query_slots(query))
 
 # This function searches your vector database (ChromaDB) to find the most relevant pieces of information (documents or records) related to the user’s query
 # For example -> Show top performing marketing campaigns in Q3.
 # filter_type: you can choose to limit the search to "sales" or "marketing" data.
 def retrieve_relevant_context(query, n_results=5, filter_type=None):
     """Retrieve relevant context from vector database based on query"""
-    _,collection = initialize_chromadb() # This connects to vector database (ChromaDB).
+    # Embed the query once — used both for the cache lookup and for the Chroma search.
+    # If a very similar query with the same filter, size and slot values was answered recently, reuse it.
+    query_embedding = _embed(query)
+    scope = _cache_scope(query, filter_type, n_results)
+    cached = _semantic_cache.get(query_embedding, scope=scope)
+    if cached is not None:
+        return cached
 
-    # If you passed filter_type="sales", then filter_dict becomes {"type": "sales"}.
+    # If you passed filter_type="sales", then filter_dict becomes {"type": {"$eq": "sales"}}.
     # This tells the database: Only give me documents where type = sales.
+    # ($eq is Chroma's explicit "equals" operator — the form newer Chroma versions expect.)
     # If no filter is given → filter_dict stays None, and it searches everything.
-    filter_dict = None
-    if filter_type:
-        filter_dict = {'type': filter_type}
+    filter_dict = _filter_for(filter_type)
     
     # It returns the most similar documents
     # Each result includes:
         #1. documents: the matching text chunks
         #2. metadatas: details like region, revenue, campaign name, etc.
         #3. distances: how close each document is to your query (lower = better)
-    results = query_vectordb(collection, query, n_results=n_results, filter_dict=filter_dict)
+    # _search_collection connects to vector database (ChromaDB) — only the first call actually opens it.
+    results = _search_collection(
+        lambda collection: query_vectordb(collection, query, n_results=n_results, filter_dict=filter_dict, query_embedding=query_embedding)
+    )
 
+    _semantic_cache.set(query_embedding, results, scope=scope)
     return results
     """
     {
@@ -34,22 +115,40 @@ def retrieve_relevant_context(query, n_results=5, filter_type=None):
     }
 
     """
-def format_retrieval_results(results):
-    """Format retrieval results into readable context"""
-    if not results or not results.get("documents"):
-        return "No relevant information found."
-    
+# Goes through the raw ChromaDB hits and skips the ones not worth sending to the LLM:
+#1. hits with relevance (cosine similarity, see distance_to_relevance) below min_relevance — mostly noise, but they still cost prompt tokens
+#2. duplicate documents (same text) — the same fact twice adds tokens and nothing else
+# The first (best) hit is always kept. Yields (rank, doc, metadata, relevance) with ranks renumbered 1, 2, 3...
+def _iter_relevant_hits(results, min_relevance=get_settings().min_relevance):
     documents = results["documents"][0]
     metadatas = results["metadatas"][0]
     distances = results["distances"][0]
 
+    seen = set()
+    rank = 0
+    for doc, metadata, distance in zip(documents, metadatas, distances):
+        relevance = distance_to_relevance(distance)
+        if rank and min_relevance is not None and relevance < min_relevance:
+            continue
+        doc_key = hash(doc[:200])
+        if doc_key in seen:
+            continue
+        seen.add(doc_key)
+        rank += 1
+        yield rank, doc, metadata, relevance
+
+def format_retrieval_results(results, min_relevance=get_settings().min_relevance):
+    """Format retrieval results into readable context"""
+    if not results or not results.get("documents"):
+        return "No relevant information found."
+
     formatted_context = []
 
-    # enumerate() gives both index (i) and the actual data (doc, metadata, distance)
-    for i, (doc, metadata, distance) in enumerate(zip(documents, metadatas, distances)):
+    # Each hit comes with its rank and the actual data (doc, metadata, relevance)
+    for rank, doc, metadata, relevance in _iter_relevant_hits(results, min_relevance):
         context_item = {
-            "rank": i+1, # The position of this result (1st, 2nd, 3rd, etc.)
-            "relevance_score": 1 - distance, # Converts distance into a more intuitive similarity score (since 1 - distance means: smaller distance = higher similarity)
+            "rank": rank, # The position of this result (1st, 2nd, 3rd, etc.)
+            "relevance_score": relevance, # Converts distance into a more intuitive similarity score (cosine similarity: smaller distance = higher similarity)
             "type": metadata.get("type", "unknown"), # Pulls the “type” field from metadata (sales, marketing, etc.)
             "content": doc, # The actual retrieved document text
             "metadata": metadata # Keeps all metadata info for further use
@@ -75,6 +174,23 @@ def format_retrieval_results(results):
   }
     ]
     """
+# The extra line of key facts shown under each retrieved document.
+# One ready-made template per record type; format_map fills in the {fields} straight from the metadata.
+# Missing fields come from _DEFAULTS and show up as "N/A" instead of raising a KeyError.
+_SALES_TMPL = "   Product: {product}, Revenue: ${revenue}, Region: {region}, Quarter: {quarter}"
+_MARKETING_TMPL = "   Campaign: {campaign_name}, Channel: {channel}, Budget: ${budget}, Conversions: {conversions}"
+_METADATA_TEMPLATES = {
+    "sales": _SALES_TMPL, # If it’s a sales record, it adds info like Product, Revenue, Region, Quarter.
+    "marketing": _MARKETING_TMPL, # If it’s a marketing record, it adds Campaign, Channel, Budget, Conversions.
+}
+_DEFAULTS = defaultdict(lambda: "N/A")
+
+def _metadata_line(item_type, metadata):
+    template = _METADATA_TEMPLATES.get(item_type)
+    if template is None:
+        return None
+    return template.format_map(ChainMap(metadata, _DEFAULTS))
+
 # Takes the structured list returned by format_retrieval_results() and turns it into a clean text summary that can be directly passed into the LLM prompt
 def create_context_string(formatted_context):
     # If the previous step returned a string (no data found), it just passes that text along — no need to format it further.
@@ -91,13 +207,9 @@ def create_context_string(formatted_context):
         context_parts.append(f"   {item['content']}")
         
         # Add key metadata
-        metadata = item['metadata']
-        if item["type"] == "sales":
-            # If it’s a sales record, it adds info like Product, Revenue, Region, Quarter.
-            context_parts.append(f"   Product: {metadata.get('product')}, Revenue: ${metadata.get('revenue')}, Region: {metadata.get('region')}, Quarter: {metadata.get('quarter')}")
-        elif item["type"] == "marketing":
-            # If it’s a marketing record, it adds Campaign, Channel, Budget, Conversions.
-            context_parts.append(f"   Campaign: {metadata.get('campaign_name')}, Channel: {metadata.get('channel')}, Budget: ${metadata.get('budget')}, Conversions: {metadata.get('conversions')}")
+        metadata_line = _metadata_line(item["type"], item['metadata'])
+        if metadata_line:
+            context_parts.append(metadata_line)
     
     # Joins all lines with newline characters.
     return "\n".join(context_parts)
@@ -114,27 +226,155 @@ def create_context_string(formatted_context):
     Campaign: Spring Blast, Channel: Email, Budget: $10000, Conversions: 230
 
     """
+# Same output as create_context_string(format_retrieval_results(results)), but done in a single pass:
+# each raw ChromaDB hit goes straight to text lines, without building the intermediate list of dicts.
+def results_to_context_string(results, min_relevance=get_settings().min_relevance):
+    """Format raw retrieval results directly into the LLM context string"""
+    if not results or not results.get("documents"):
+        return "No relevant information found."
+
+    lines = ["Retrieved relevant information:\n"]
+    for rank, doc, metadata, relevance in _iter_relevant_hits(results, min_relevance):
+        item_type = metadata.get("type", "unknown")
+        lines.append(f"\n{rank}. [{item_type.upper()}] (Relevance: {relevance:.2f})")
+        lines.append(f"   {doc}")
+        metadata_line = _metadata_line(item_type, metadata)
+        if metadata_line:
+            lines.append(metadata_line)
+
+    return "\n".join(lines)
+
+# Exact-match cache for the retrieve_* helpers below.
+# Same call (query, n_results, min_relevance) → the finished context string is returned straight from memory.
+# Each entry remembers when it was stored and is looked up again once retrieval_cache_ttl seconds have passed
+# since then, so entries expire one at a time instead of all at once.
+# The call is bound to the decorated function's own signature, so its defaults apply and
+# retrieve_x(q) and retrieve_x(q, n_results=5) share one entry.
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+def _ttl_lru_cache(maxsize=256, ttl=get_settings().retrieval_cache_ttl):
+    def decorator(func):
+        signature = inspect.signature(func)
+        entries = OrderedDict()  # call key → (expires_at, value), least recently used first
+        stats = {"hits": 0, "misses": 0}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(bound.arguments.items())
+            with lock:
+                entry = entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    entries.move_to_end(key) # mark as recently used
+                    stats["hits"] += 1
+                    return entry[1]
+                stats["misses"] += 1
+
+            value = func(*bound.args, **bound.kwargs)
+            with lock:
+                entries[key] = (time.monotonic() + ttl, value)
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+            return value
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+                stats["hits"] = stats["misses"] = 0
+
+        def cache_info():
+            with lock:
+                return CacheInfo(stats["hits"], stats["misses"], maxsize, len(entries))
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        return wrapper
+    return decorator
+
 # A specialized helper that retrieves and formats sales-related information from your vector database.
 # here we pass filter_type="sales" — so it only searches for documents tagged with type = "sales" in vector store (like ChromaDB).
-def retrieve_sales_data(query, n_results=5):
+@_ttl_lru_cache()
+# min_relevance: hits scoring below this are left out of the context (None keeps everything)
+def retrieve_sales_data(query, n_results=5, min_relevance=get_settings().min_relevance):
     # Retrieve from the vector database
     results = retrieve_relevant_context(query, n_results=n_results, filter_type="sales")
-    # This converts raw ChromaDB output into a cleaner list of dictionaries
-    formatted = format_retrieval_results(results)
-    # This turns your formatted results into a natural-language summary. That text is perfect for passing into an LLM prompt.
-    return create_context_string(formatted)
+    # This turns the raw ChromaDB output into a natural-language summary. That text is perfect for passing into an LLM prompt.
+    return results_to_context_string(results, min_relevance)
 
-def retrieve_marketing_data(query, n_results=5):
+@_ttl_lru_cache()
+def retrieve_marketing_data(query, n_results=5, min_relevance=get_settings().min_relevance):
     """Retrieve marketing-specific data"""
     results = retrieve_relevant_context(query, n_results=n_results, filter_type="marketing")
-    formatted = format_retrieval_results(results)
-    return create_context_string(formatted)
+    return results_to_context_string(results, min_relevance)
 
-def retrieve_combined_data(query, n_results=5):
+@_ttl_lru_cache()
+def retrieve_combined_data(query, n_results=5, min_relevance=get_settings().min_relevance):
     """Retrieve both sales and marketing data"""
     results = retrieve_relevant_context(query, n_results=n_results)
-    formatted = format_retrieval_results(results)
-    return create_context_string(formatted)
+    return results_to_context_string(results, min_relevance)
+
+# Retrieves the context for several reports at once.
+# requests → list of (query, report_type, n_results) tuples; returns one context string per request, in order.
+# Instead of one embedding + one search per report:
+#1. all queries are embedded together in a single batch
+#2. queries with the same filter (sales / marketing / everything) share ONE Chroma search,
+#   asking for the largest n_results in the group and trimming each query's hits to its own n_results
+# Queries answered recently (semantic cache) skip the search entirely.
+def retrieve_contexts_batch(requests, min_relevance=get_settings().min_relevance):
+    """Retrieve RAG context strings for several report requests at once"""
+    if not requests:
+        return []
+
+    embeddings = _embed_many([query for query, _, _ in requests])
+    raw_results = [None] * len(requests)
+    groups = {}  # filter_type → indices of requests that still need a search
+
+    for i, ((query, report_type, n_results), embedding) in enumerate(zip(requests, embeddings)):
+        filter_type = REPORT_TYPE_FILTERS.get(report_type)
+        cached = _semantic_cache.get(embedding, scope=_cache_scope(query, filter_type, n_results))
+        if cached is not None:
+            raw_results[i] = cached
+        else:
+            groups.setdefault(filter_type, []).append(i)
+
+    if groups:
+        for filter_type, indices in groups.items():
+            max_n = max(requests[i][2] for i in indices)
+            batch = _search_collection(lambda collection: query_vectordb_batch(
+                collection,
+                [embeddings[i] for i in indices],
+                n_results=max_n,
+                filter_dict=_filter_for(filter_type),
+            ))
+            # Row `row` of the batch answer belongs to request `i`; cut it down to that request's size
+            for row, i in enumerate(indices):
+                n_results = requests[i][2]
+                results = {
+                    "documents": [batch["documents"][row][:n_results]],
+                    "metadatas": [batch["metadatas"][row][:n_results]],
+                    "distances": [batch["distances"][row][:n_results]],
+                }
+                _semantic_cache.set(embeddings[i], results, scope=_cache_scope(requests[i][0], filter_type, n_results))
+                raw_results[i] = results
+
+    return [results_to_context_string(results, min_relevance) for results in raw_results]
+
+# Called by load_data_to_vectordb() after new data is loaded, so no old (now outdated) results are served.
+# This also deletes the semantic cache saved on disk, so the next start doesn't load it back.
+def clear_retrieval_caches():
+    """Clear every retrieval cache"""
+    for helper in (retrieve_sales_data, retrieve_marketing_data, retrieve_combined_data):
+        helper.cache_clear()
+    _embedding_cache.clear()
+    _semantic_cache.clear()
+    for extension in (".npz", ".json"):
+        try:
+            os.remove(SEMANTIC_CACHE_PATH + extension)
+        except FileNotFoundError:
+            pass
 
 if __name__ == "__main__":
     # Test RAG retrieval
@@ -144,6 +384,10 @@ if __name__ == "__main__":
     print(f"\nQuery: {query}")
     print(f"\nContext:\n{context}")
 
+    # Same query again → served from the exact-match cache
+    retrieve_combined_data(query, n_results=3)
+    print(f"\nCache: {retrieve_combined_data.cache_info()}")
+
 
 
 
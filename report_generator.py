@@ -7,69 +7,82 @@ Report generation functions for sales and marketing analysis
 # json and datetime → used for saving or formatting data.
 
 from agent import generate_report_with_rag, generate_custom_report
-from rag_retrieval import retrieve_combined_data
+from rag_retrieval import retrieve_combined_data, retrieve_contexts_batch
 import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Each *_request function describes a report as a dict: the query text, the report type and how many
+# records to retrieve. The matching generate_* function runs it on its own; generate_reports_batched()
+# can run several of them together.
+
+# Builds a query text from a fixed start plus optional parts.
+# slots → (template, value) pairs such as ("in {}", region); a part is only added when its value is set.
+# e.g. _build_query("Analyze sales performance", ("in {}", "Europe"), ("for {}", None))
+#      → "Analyze sales performance in Europe"
+def _build_query(prefix, *slots):
+    return " ".join([prefix] + [template.format(value) for template, value in slots if value])
+
+def sales_performance_request(region=None, quarter=None):
+    """Describe a sales performance report"""
+    query = _build_query("Analyze sales performance", ("in {}", region), ("for {}", quarter))
+    return {"query": query, "report_type": "sales", "n_results": 8}
 
 # Generates a sales performance report, optionally filtered by region or quarter.
 # Adds region and quarter if provided (like “in North America for Q1 2024”)
 # Returns the report text
-
 def generate_sales_performance_report(region=None, quarter=None):
     """Generate a sales performance report"""
-    query_part = ["Analyze sales performance"]
-
-    if region:
-        query_part.append(f"in {region}")
-    if quarter:
-        query_part.append(f"for {quarter}")
-    
-    query = " ".join(query_part)
+    request = sales_performance_request(region, quarter)
 
     print(f"Generating Sales Performance Report ...")
-    print(f"Query: {query}\n")
+    print(f"Query: {request['query']}\n")
 
-    report = generate_report_with_rag(query, report_type="sales", n_results=8)
+    report = generate_report_with_rag(request["query"], report_type=request["report_type"], n_results=request["n_results"])
     return report
 
 
 # Analyzes how marketing campaigns performed, filtered by channel (e.g., “social media”) or quarter.
 
+def marketing_campaign_request(channel=None, quarter=None):
+    """Describe a marketing campaign analysis report"""
+    query = _build_query("Analyze marketing campaign performance", ("for {} channel", channel), ("in {}", quarter))
+    return {"query": query, "report_type": "marketing", "n_results": 8}
+
 def generate_marketing_campaign_report(channel=None, quarter=None):
     """Generate a marketing campaign analysis report"""
-    query_part = ["Analyze marketing campaign performance"]
-
-    if channel:
-        query_part.append(f"for {channel} channel")
-    if quarter:
-        query_part.append(f"in {quarter}")
-    
-    query = " ".join(query_part)
+    request = marketing_campaign_request(channel, quarter)
 
     print(f"Generating marketing campaign report...")
-    print(f"Query: {query}\n")
+    print(f"Query: {request['query']}\n")
 
-    report = generate_report_with_rag(query, report_type="marketing", n_results=8)
+    report = generate_report_with_rag(request["query"], report_type=request["report_type"], n_results=request["n_results"])
     return report
 
 
 # Gives a combined summary of both sales and marketing for a specific quarter.
 
+def quarterly_summary_request(quarter):
+    """Describe a comprehensive quarterly summary report"""
+    query = _build_query("Provide a comprehensive summary of sales and marketing performance", ("for {}", quarter))
+    return {"query": query, "report_type": "combined", "n_results": 10}
+
 def generate_quarterly_summary_report(quarter):
     """Generate a comprehensive quarterly summary report"""
-    query = f"Provide a comprehensive summary of sales and marketing performance for {quarter}"
+    request = quarterly_summary_request(quarter)
 
     print(f"Generating quarterly summary report for {quarter}...")
-    print(f"Query: {query}\n")
+    print(f"Query: {request['query']}\n")
 
-    report = generate_report_with_rag(query, report_type="combined", n_results=10)
+    report = generate_report_with_rag(request["query"], report_type=request["report_type"], n_results=request["n_results"])
     return report
 
 # Focuses on one product’s sales + marketing performance
 
 def generate_product_analysis_report(product_name):
     """Generate a product-specific analysis report"""
-    query = f"Analyze the performance and marketing of {product_name}"
+    query = _build_query("Analyze the performance and marketing", ("of {}", product_name))
 
     print(f"Generating product analysis report for {product_name}...")
     print(f"Query: {query}\n")
@@ -81,7 +94,7 @@ def generate_product_analysis_report(product_name):
 
 def generate_regional_analysis_report(region):
     """Generate a regional analysis report"""
-    query = f"Analyze sales and marketing performance in {region}"
+    query = _build_query("Analyze sales and marketing performance", ("in {}", region))
     
     print(f"Generating regional analysis report for {region}...")
     print(f"Query: {query}\n")
@@ -100,30 +113,65 @@ def generate_custom_analysis_report(custom_query):
     return report
 
 
+# Fetches the RAG context for several report requests in ONE batched retrieval step.
+# queries → list of request dicts (from the *_request functions above), e.g.
+#   [sales_performance_request(), marketing_campaign_request(), quarterly_summary_request("Q3 2024")]
+# All queries are embedded together and searched in as few Chroma calls as possible.
+# Returns one context string per request, in the same order.
+def retrieve_batched_contexts(queries):
+    """Retrieve the context for several report requests at once"""
+    requests = [(q["query"], q["report_type"], q["n_results"]) for q in queries]
+
+    print(f"Retrieving context for {len(requests)} reports in one batch...")
+    return retrieve_contexts_batch(requests)
+
+# Runs one request dict through the agents. With prefetched_context the RAG step is skipped.
+def generate_report_from_request(request, prefetched_context=None):
+    """Generate the report described by a request dict"""
+    print(f"Query: {request['query']}\n")
+    return generate_report_with_rag(request["query"], report_type=request["report_type"],
+                                    n_results=request["n_results"], prefetched_context=prefetched_context)
+
+# Generates several reports with ONE batched retrieval step, then runs the agents for all of them
+# at the same time. Each report is mostly waiting on the LLM API (network, not CPU), so threads
+# let the requests overlap: total time ≈ the slowest report instead of the sum of all of them.
+# Returns the reports in the same order as queries.
+def generate_reports_batched(queries, max_workers=3):
+    """Generate several reports sharing one batched retrieval"""
+    contexts = retrieve_batched_contexts(queries)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(generate_report_from_request, queries, contexts))
+
+
 def save_report_to_file(report, filename=None):
     """Save generated report to a text file"""
     if not filename:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"report_{timestamp}.txt"
     
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(report)
+    # One call opens, writes and closes the file. Text mode keeps the platform's line endings (CRLF on Windows).
+    Path(filename).write_text(report, encoding="utf-8")
 
     print(f"\nReport saved to: {filename}")
     return filename
 
+# All possible report types with their descriptions.
+# Built once; get_available_report_types() hands out a copy, so a caller that changes its dict can't change this one.
+_REPORT_TYPES = {
+    "sales_performance": "Sales performance analysis by region/quarter",
+    "marketing_campaign": "Marketing campaign performance analysis",
+    "quarterly_summary": "Comprehensive quarterly summary",
+    "product_analysis": "Product-specific performance analysis",
+    "regional_analysis": "Regional sales and marketing analysis",
+    "custom": "Custom analysis based on your query"
+}
+
 # Returns a dictionary listing all possible report types with their descriptions
 
 def get_available_report_types():
     """Return available report types"""
-    return {
-        "sales_performance": "Sales performance analysis by region/quarter",
-        "marketing_campaign": "Marketing campaign performance analysis",
-        "quarterly_summary": "Comprehensive quarterly summary",
-        "product_analysis": "Product-specific performance analysis",
-        "regional_analysis": "Regional sales and marketing analysis",
-        "custom": "Custom analysis based on your query"
-    }
+    return dict(_REPORT_TYPES)
 
 if __name__ == "__main__":
     # Example Usage
@@ -5,6 +5,35 @@ Save agent conversation logs to a file
 from agent import generate_report_with_autogen_multiagent
 from datetime import datetime
 import sys
+import threading
+
+# A stand-in for sys.stdout that writes everything to several places at once (like the Unix `tee` command):
+# here the console AND the log file, so you still see the agents working while the log is saved.
+# The lock keeps two threads from mixing their text in the middle of a line.
+# The first stream is the console; the others are files that keep their own write buffer.
+class Tee:
+    """Write stdout text to several streams at once"""
+
+    def __init__(self, *streams):
+        self.streams = streams
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            for stream in self.streams:
+                stream.write(text)
+        return len(text)
+
+    # AutoGen prints with flush=True after almost every message. Only the console needs that (so the text
+    # shows up right away); flushing the files too would empty their buffer on every message.
+    # The files are written out when their buffer is full and when they are closed.
+    def flush(self):
+        with self._lock:
+            self.streams[0].flush()
+
+    # Anything else (encoding, isatty(), fileno() ... which e.g. colour libraries check) comes from the console stream
+    def __getattr__(self, name):
+        return getattr(self.streams[0], name)
 
 # Redirect output to file
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -14,16 +43,19 @@ log_file = f"agent_conversation_log_{timestamp}.txt"
 # Opens (or creates) the log file in write mode ('w').
 # Using encoding='utf-8' ensures all characters — including emojis, symbols, etc. — are saved correctly.
 # The with block automatically closes the file when done.
-with open(log_file, "w", encoding="utf-8") as f:
+# buffering=1 MB → print() text collects in memory and is written to disk in big chunks,
+# instead of one small write for (almost) every line the agents print.
+LOG_BUFFER_SIZE = 1 << 20
+
+with open(log_file, "w", encoding="utf-8", buffering=LOG_BUFFER_SIZE) as f:
     # Save original stdout
     # sys.stdout is Python’s “standard output” — where print() messages go (normally, in console).
     # We’re saving the current one so you can restore it later.
     original_stdout = sys.stdout
 
-    # Redirect stdout to file
-    # Instead of printing to the console, send all print() output to this file.
-    # Every print() statement from this point will write text into the file.
-    sys.stdout = f
+    # Redirect stdout to console + file
+    # Every print() statement from this point will write text to the console and into the file.
+    sys.stdout = Tee(original_stdout, f)
 
     print("="*80)
     print("MICROSOFT AUTOGEN AGENT CONVERSATION LOG")
@@ -39,7 +71,7 @@ with open(log_file, "w", encoding="utf-8") as f:
 
     # Generate report (all agent conversations will be captured)
     # Calling our main agent function
-    # All of its print() outputs (conversation logs, agent responses, etc.) will now go into the log file — not to the console.
+    # All of its print() outputs (conversation logs, agent responses, etc.) will now go into the log file — and still show in the console.
     # The function returns the final summary report.
     report = generate_report_with_autogen_multiagent(query, "combined", n_results=8)
 
@@ -52,8 +84,10 @@ with open(log_file, "w", encoding="utf-8") as f:
     print("END OF CONVERSATION LOG")
     print("="*80)
 
-    # This restores normal console output
-    # After this point, any print() will again show up in the terminal — not the file.
+    # Restore normal console output.
+    # After this point, any print() will only show up in the terminal — not the file.
+    # Whatever is still sitting in the file's buffer is written when the with block closes the file.
+    sys.stdout.flush()
     sys.stdout = original_stdout
 
 print(f"\n✓ Agent conversation log saved to: {log_file}")
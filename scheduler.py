@@ -2,22 +2,108 @@
 Scheduler for automated daily report generation and email delivery
 """
 
-import schedule # Used to run functions automatically at a set time every day.
-import time # Allows the program to “sleep” for a while between checks.
+from apscheduler.schedulers.blocking import BlockingScheduler # Runs functions automatically at a set time every day.
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore # Keeps the scheduled job in a small SQLite file.
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR # Lets us save the retrieval cache after every run.
 from datetime import datetime # Used for timestamps.
 import pytz # Handles time zones correctly (e.g., IST).
+import sys # sys.stdout.write for grouped console output.
+import io # in-memory text buffer that collects one report thread's output.
+import threading # Lock and per-thread buffers that keep the output of the report threads from mixing.
+from concurrent.futures import ThreadPoolExecutor, as_completed # Runs the three reports at the same time.
 from config import SCHEDULE_TIME, TIMEZONE, RECIPIENT_EMAIL
 from report_generator import (
-    generate_sales_performance_report,
-    generate_marketing_campaign_report,
-    generate_quarterly_summary_report,
+    sales_performance_request,
+    marketing_campaign_request,
+    quarterly_summary_request,
+    retrieve_batched_contexts,
+    generate_report_from_request,
     save_report_to_file
 )
 from email_sender_html import send_html_email_with_charts
 from visualizations import generate_all_charts
 from telegram_sender import send_to_telegram
+from vector_db import warmup_vectordb
+from rag_retrieval import load_semantic_cache, save_semantic_cache
 import os
 
+# The timezone object is looked up once and reused for every timestamp
+_TZ = pytz.timezone(TIMEZONE)
+
+# SCHEDULE_TIME ("09:00") split into hour and minute once, for the daily cron trigger
+_SCHEDULE_HOUR, _SCHEDULE_MINUTE = map(int, SCHEDULE_TIME.split(":"))
+
+# Where the scheduled job is stored. Because the job lives in this file (not only in memory),
+# a restarted scheduler knows when the job last ran and when it is due next.
+JOB_STORE_URL = "sqlite:///jobs.sqlite"
+
+_print_lock = threading.Lock()
+
+# Writes a group of lines to the console in ONE write (instead of one print() call per line),
+# under the same lock the report threads use, so a block is never split by another thread's output.
+def _emit(*lines):
+    with _print_lock:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+# A stand-in for sys.stdout while the report threads run.
+# AutoGen prints the agent conversation with plain print() calls, and sys.stdout is shared by the
+# whole process, so three reports running at once would mix their lines on the console.
+# A thread that called capture() gets its own in-memory buffer (threading.local), so its prints
+# land there instead; every other thread writes straight to the real stdout.
+class _ThreadOutput:
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+
+    # Stops capturing in this thread and returns what it printed
+    def release(self):
+        buffer = self._local.__dict__.pop("buffer", None)
+        return buffer.getvalue() if buffer is not None else ""
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self.stream
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    # Anything else (encoding, isatty, ...) comes from the real stdout
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# A section title between two "=====" lines, as one block
+def _banner(title):
+    return ("\n" + "="*80, title, "="*80)
+
+# Loads the ChromaDB index before the first report (see vector_db.warmup_vectordb).
+# A failed warm-up is only reported — the report run itself will try again and show the real error.
+def _warmup():
+    try:
+        warmup_vectordb()
+        _emit("✓ Vector database warmed up")
+    except Exception as e:
+        _emit(f"✗ Vector database warm-up failed: {e}")
+
+# Worker for one report: generates it with its prefetched context and saves it to filename.
+# Everything the thread prints (the agent conversation included) is collected in its own buffer
+# and written to the console in one block when the report is done, so the three reports never interleave.
+def _generate_and_save(request, context, filename, output):
+    output.capture()
+    try:
+        report = generate_report_from_request(request, prefetched_context=context)
+        save_report_to_file(report, filename)
+    except BaseException:
+        _emit(output.release().rstrip("\n")) # still show what the failed report printed
+        raise
+    _emit(output.release().rstrip("\n"), f"✓ Saved: {filename}")
+    return filename
+
 # This function is responsible for:
     #1. Generating three types of reports (Sales, Marketing, Summary)
     #2. Saving them as .txt files
@@ -28,72 +114,74 @@ import os
 def generate_and_send_daily_reports():
     """Generate reports and send via email"""
 
-    print("\n" + "="*80)
-    print(f"GENERATING DAILY REPORTS - {datetime.now(pytz.timezone(TIMEZONE)).strftime('%B %d, %Y %I:%M %p IST')}")
-    print("="*80)
+    # One clock reading for the whole run: the header and all three file names use the same moment,
+    # even if the run crosses midnight.
+    now = datetime.now(_TZ)
+    header_ts = now.strftime('%B %d, %Y %I:%M %p IST')
+    timestamp = now.strftime("%Y%m%d") # will be used to name the files uniquely each day (like 20251013).
 
-    report_files = [] # hold the filenames of all the generated reports.
-    timestamp = datetime.now().strftime("%Y%m%d") # will be used to name the files uniquely each day (like 20251013).
+    _emit(*_banner(f"GENERATING DAILY REPORTS - {header_ts}"))
 
     try:
-        # Generate Sales Performance Report
-        # It’s saved as daily_sales_report_20251013.txt
-        # The filename is added to report_files list.
-        print("\n[1/3] Generating Sales Performance Report...")
-        sales_report = generate_sales_performance_report()
-        sales_file = f"daily_sales_report_{timestamp}.txt"
-        save_report_to_file(sales_report, sales_file)
-        report_files.append(sales_file)
-        print(f"✓ Saved: {sales_file}")
-
-        # Generate Marketing Campaign Report
-        print("\n[2/3] Generating Marketing Campaign Report...")
-        marketing_report = generate_marketing_campaign_report()
-        marketing_file = f"daily_marketing_report_{timestamp}.txt"
-        save_report_to_file(marketing_report, marketing_file)
-        report_files.append(marketing_file)
-        print(f"✓ Saved: {marketing_file}")
-
-        # Generate Combined Summary
-        print("\n[3/3] Generating Executive Summary...")
-        summary_report = generate_quarterly_summary_report("Q3 2024")
-        summary_file = f"daily_executive_summary_{timestamp}.txt"
-        save_report_to_file(summary_report, summary_file)
-        report_files.append(summary_file)
-        print(f"✓ Saved: {summary_file}")
-
-        print("\n" + "="*80)
-        print("REPORTS GENERATED SUCCESSFULLY")
-        print("="*80)
+        # The three daily reports and the file each one is saved to.
+        # It’s saved as e.g. daily_sales_report_20251013.txt
+        jobs = [
+            (sales_performance_request(), f"daily_sales_report_{timestamp}.txt"),
+            (marketing_campaign_request(), f"daily_marketing_report_{timestamp}.txt"),
+            (quarterly_summary_request("Q3 2024"), f"daily_executive_summary_{timestamp}.txt"),
+        ]
+
+        # Their RAG retrieval runs as one batch: one embedding pass and one search per data type,
+        # instead of three separate embed + search round-trips.
+        _emit("\nGenerating Sales, Marketing and Executive Summary reports...")
+        contexts = retrieve_batched_contexts([request for request, _ in jobs])
+
+        # The reports don't depend on each other and each one is mostly waiting on the LLM API,
+        # so all three run at the same time in their own thread (≈ 1× LLM latency instead of 3×).
+        # Each thread also saves its own file, so the disk writes overlap too.
+        # While they run, sys.stdout is a _ThreadOutput, so each report's output is shown as one block.
+        output = _ThreadOutput(sys.stdout)
+        sys.stdout = output
+        try:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = {
+                    executor.submit(_generate_and_save, request, context, filename, output): filename
+                    for (request, filename), context in zip(jobs, contexts)
+                }
+                for future in as_completed(futures):
+                    future.result() # re-raises an error from the worker thread here
+        finally:
+            sys.stdout = output.stream
+
+        # Filenames in a fixed order (Sales, Marketing, Summary), whichever report finished first
+        report_files = [filename for _, filename in jobs]
 
         # Generate visualizations
-        print("\n" + "="*80)
-        print("GENERATING VISUALIZATIONS")
-        print("="*80)
+        _emit(*_banner("REPORTS GENERATED SUCCESSFULLY"), *_banner("GENERATING VISUALIZATIONS"))
 
         chart_files = generate_all_charts()
 
         # Send email with reports and charts
-        print("\n" + "="*80)
-        print("SENDING BEAUTIFUL HTML EMAIL WITH CHARTS")
-        print("="*80)
+        _emit(*_banner("SENDING BEAUTIFUL HTML EMAIL WITH CHARTS"))
 
         success = send_html_email_with_charts(report_files, chart_files)
 
+        # The delivery results are collected and written together at the end
+        status = []
         if success:
-            print("\n✓ Email sent successfully!")
+            status.append("\n✓ Email sent successfully!")
         
         # Send to Telegram
         try:
             send_to_telegram(report_files, chart_files)
-            print("\n✓ Telegram sent successfully!")
+            status.append("\n✓ Telegram sent successfully!")
         except Exception as e:
-            print(f"\n✗ Telegram error: {e}")
+            status.append(f"\n✗ Telegram error: {e}")
         
-        print("\n" + "="*80)
+        _emit(*status, "\n" + "="*80)
 
     except Exception as e:
-        print(f"\n✗ Error generating reports: {str(e)}")
+        _emit(f"\n✗ Error generating reports: {str(e)}")
         return False
     
     return True
@@ -106,42 +194,69 @@ def generate_and_send_daily_reports():
     #4. And confirms the scheduler has started successfully
 def start_scheduler():
     """Start the scheduler to run daily at specified time"""
-    print("\n" + "="*80)
-    print("AUTOMATED REPORT SCHEDULER")
-    print("="*80)
-    print(f"\nScheduled Time: {SCHEDULE_TIME} {TIMEZONE}")
-    print(f"Recipient: {RECIPIENT_EMAIL}")
-    print(f"Current Time: {datetime.now(pytz.timezone(TIMEZONE)).strftime('%I:%M %p IST')}")
-    print("\nScheduler is running... Press Ctrl+C to stop.")
-    print("="*80)
+    _emit(
+        *_banner("AUTOMATED REPORT SCHEDULER"),
+        f"\nScheduled Time: {SCHEDULE_TIME} {TIMEZONE}",
+        f"Recipient: {RECIPIENT_EMAIL}",
+        f"Current Time: {datetime.now(_TZ).strftime('%I:%M %p IST')}",
+        "\nScheduler is running... Press Ctrl+C to stop.",
+        "="*80,
+    )
+
+    # Reuse the retrieval results saved by the previous run (see rag_retrieval.SEMANTIC_CACHE_PATH)
+    load_semantic_cache()
+    _warmup()
 
     # Schedule the job
-    # Every day at the time in SCHEDULE_TIME (e.g., "09:00"),run the function generate_and_send_daily_reports()
-    schedule.every().day.at(SCHEDULE_TIME).do(generate_and_send_daily_reports)
+    # Every day at the time in SCHEDULE_TIME (e.g., "09:00"), run the function generate_and_send_daily_reports()
+    # The job is referenced by name ("scheduler:...") so it can be stored in the job store and loaded again.
+    # replace_existing=True → restarting the scheduler updates the stored job instead of adding a second one.
+    # misfire_grace_time + coalesce → if the program was down at 09:00 and comes back within an hour,
+    # the missed report still runs once (not once per missed day).
+    scheduler = BlockingScheduler(
+        timezone=_TZ,
+        jobstores={"default": SQLAlchemyJobStore(url=JOB_STORE_URL)}
+    )
+    scheduler.add_job(
+        "scheduler:generate_and_send_daily_reports",
+        "cron",
+        hour=_SCHEDULE_HOUR,
+        minute=_SCHEDULE_MINUTE,
+        id="daily_reports",
+        replace_existing=True,
+        misfire_grace_time=3600,
+        coalesce=True
+    )
+
+    # After every run (successful or not) the retrieval cache is saved, so a crash later on doesn't lose it
+    scheduler.add_listener(lambda event: save_semantic_cache(), EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
 
     # Run continuously
-    # Runs an infinite loop that keeps your program alive.
-    # Every 60 seconds, it checks if it’s time to run your job.
-    # When the clock matches SCHEDULE_TIME, your report generator runs.
+    # start() keeps your program alive and sleeps until the next run time — it doesn't check the clock
+    # over and over, so the program uses no CPU while waiting, and the report starts right on time.
     # If you press Ctrl + C in the terminal, it stops gracefully.
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60) # Check every minute
-    except KeyboardInterrupt:
-        print("\n\nScheduler stopped by user.")
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown(wait=False)
+        _emit("\n\nScheduler stopped by user.")
+    finally:
+        save_semantic_cache()
 
 def run_now():
     """Run report generation immediately (for testing)"""
-    print("\nRunning report generation NOW (test mode)...\n")
-    generate_and_send_daily_reports()
+    _emit("\nRunning report generation NOW (test mode)...\n")
+    load_semantic_cache()
+    _warmup()
+    try:
+        generate_and_send_daily_reports()
+    finally:
+        save_semantic_cache()
 
 # How it works:
 # If you run your script normally: -> It will start the daily scheduler
 # If you run it with "now" argument: -> It will immediately generate and send the reports (test mode).
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == "now":
         # Run immediately for testing
         run_now()
@@ -0,0 +1,205 @@
+"""
+Semantic (embedding-similarity) cache for RAG retrieval results
+"""
+
+import os
+import re # finds the slot values (names, quarters, years) in a query
+import json # the stored results and scopes are saved as JSON
+import threading # the lock that makes the cache safe to share between report threads
+import time # entries are stamped with the time they were stored
+from collections import OrderedDict # remembers insertion order → lets us evict the least recently used entry
+import numpy as np # used for the fast similarity calculation
+
+
+# This cache remembers the results of recent searches, keyed by the *meaning* of the query
+# (its embedding vector) instead of the exact text.
+# So "top products North America" and "best-selling products in NA" can share one result.
+# threshold: how similar two queries must be (cosine similarity, 1.0 = identical) to count as a hit
+# maxsize: how many recent queries to remember before the oldest one is dropped
+# ttl: seconds an entry stays valid (None = until it is evicted); the time it was stored is saved with it,
+#      so an entry loaded from disk still expires on schedule
+#
+# To avoid comparing a new query with every cached one, entries are grouped with LSH
+# (locality-sensitive hashing, random projections):
+#1. n_tables random "views" of the embedding space, each made of n_bits random directions (hyperplanes)
+#2. for each direction we note whether the vector points to its + or − side → an n_bits bucket number per table
+#3. similar vectors land in the same bucket in at least one table with high probability
+# A lookup only compares against the entries sharing a bucket with the query.
+class SemanticCache:
+    """In-memory LRU cache keyed on query embedding similarity"""
+
+    def __init__(self, threshold=0.95, maxsize=256, n_tables=8, n_bits=16, seed=0, ttl=None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        # A fixed seed gives the same random directions every run, so a cache saved to disk stays valid
+        self.seed = seed
+        # entry id → (embedding, scope, payload, bucket keys, time stored)
+        self._entries = OrderedDict()
+        self._next_id = 0
+        # One dict per table: bucket number → set of entry ids in that bucket
+        self._tables = [dict() for _ in range(n_tables)]
+        # Random projection directions, created once we know the embedding size
+        self._planes = None
+        self._powers = 1 << np.arange(n_bits, dtype=np.int64)
+        # The report threads share one cache; every public method holds this lock while it works.
+        self._lock = threading.Lock()
+
+    # Turns the vector into length 1, so a plain dot product equals cosine similarity
+    @staticmethod
+    def _normalize(embedding):
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    # Bucket number of the vector in every table (one matrix-vector product for all tables)
+    def _bucket_keys(self, vec):
+        if self._planes is None or self._planes.shape[1] != vec.shape[0]:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.n_tables * self.n_bits, vec.shape[0])).astype(np.float32)
+        signs = (self._planes @ vec > 0).reshape(self.n_tables, self.n_bits)
+        return [int(k) for k in signs.astype(np.int64) @ self._powers]
+
+    def _remove(self, entry_id):
+        _, _, _, keys, _ = self._entries.pop(entry_id)
+        for table, key in zip(self._tables, keys):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[key]
+
+    # scope: extra information that must match exactly (e.g. filter type + n_results + query_slots),
+    # because the same question with a different filter or a different region needs a different answer.
+    def get(self, embedding, scope=None):
+        """Return the cached payload for a similar query, or None"""
+        with self._lock:
+            return self._get(embedding, scope)
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _get(self, embedding, scope):
+        if not self._entries:
+            return None
+
+        q_vec = self._normalize(embedding)
+
+        # Every entry that shares a bucket with the query in at least one table
+        candidates = set()
+        for table, key in zip(self._tables, self._bucket_keys(q_vec)):
+            candidates.update(table.get(key, ()))
+        candidates = [i for i in candidates if self._entries[i][1] == scope]
+        # Expired entries are dropped as soon as a lookup finds them
+        for i in [i for i in candidates if self._expired(self._entries[i][4])]:
+            self._remove(i)
+            candidates.remove(i)
+        if not candidates:
+            return None
+
+        # One matrix-vector product gives the similarity against all candidates at once
+        sims = np.stack([self._entries[i][0] for i in candidates]) @ q_vec
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+
+        entry_id = candidates[best]
+        self._entries.move_to_end(entry_id) # mark as recently used
+        return self._entries[entry_id][2]
+
+    def set(self, embedding, payload, scope=None):
+        """Store a payload for this query embedding"""
+        with self._lock:
+            self._set(embedding, payload, scope)
+
+    def _set(self, embedding, payload, scope, stored_at=None):
+        vec = self._normalize(embedding)
+        keys = self._bucket_keys(vec)
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries[entry_id] = (vec, scope, payload, keys, time.time() if stored_at is None else stored_at)
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, set()).add(entry_id)
+
+        # Drop the least recently used entries once we are over the limit
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._tables = [dict() for _ in range(self.n_tables)]
+
+    # Saves the entries (oldest first), with the time each was stored, so the next run starts with a warm cache.
+    # Two files: path + ".npz" holds the embeddings as one float32 matrix, path + ".json" the scope, payload
+    # and time of each entry (same order). Neither format can run code when it is loaded, unlike pickle.
+    # Payloads and scopes must be JSON-friendly (lists, dicts, strings, numbers; NumPy values are converted).
+    # Bucket tables are not saved; they are rebuilt from the embeddings on load.
+    def save(self, path):
+        """Save the cache entries to path.npz and path.json"""
+        with self._lock:
+            entries = list(self._entries.values())
+        vectors = np.stack([vec for vec, *_ in entries]) if entries else np.empty((0, 0), dtype=np.float32)
+        records = [{"scope": scope, "payload": payload, "stored_at": stored_at} for _, scope, payload, _, stored_at in entries]
+
+        # Each file is written next to its final name and swapped in one step, so a crash never leaves a half-written file
+        with open(path + ".npz.tmp", "wb") as f:
+            np.savez(f, embeddings=vectors)
+        with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(records, f, default=_to_json)
+        os.replace(path + ".npz.tmp", path + ".npz")
+        os.replace(path + ".json.tmp", path + ".json")
+
+    # Entries that have expired in the meantime are skipped.
+    # Files that don't match each other (different entry counts, e.g. after an interrupted save) are ignored.
+    def load(self, path):
+        """Load cache entries saved by save(); missing or unreadable files are ignored"""
+        try:
+            with np.load(path + ".npz", allow_pickle=False) as data:
+                vectors = data["embeddings"]
+            with open(path + ".json", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return
+        if not isinstance(records, list) or len(records) != len(vectors):
+            return
+        with self._lock:
+            for vec, record in zip(vectors, records):
+                if not self._expired(record["stored_at"]):
+                    self._set(vec, record["payload"], _to_scope(record["scope"]), record["stored_at"])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# json.dump fallback for the NumPy values Chroma can return (arrays, float32 distances)
+def _to_json(value):
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# The values that fill a query template's slots: capitalised words after the first word
+# (regions, products, channels, campaign names) and anything containing a digit (quarters, years).
+# "Analyze sales performance in North America for Q3 2024" → ("2024", "america", "north", "q3")
+# Two queries from the same template differ only in these words, so their embeddings can be almost
+# identical (cosine above the threshold) while they need different documents. Putting the slot values
+# into the cache scope keeps them apart; paraphrases that name the same things still share an entry.
+_SLOT_WORD = re.compile(r"\b(?:[A-Z][\w&'-]*|\w*\d\w*)")
+
+def query_slots(query):
+    """Return the sorted, lower-cased slot values of a query"""
+    first, _, rest = query.strip().partition(" ")
+    slots = {word.lower() for word in _SLOT_WORD.findall(rest)}
+    if any(ch.isdigit() for ch in first):
+        slots.add(first.lower())
+    return tuple(sorted(slots))
+
+# JSON turns tuples into lists; scopes are compared with ==, so they are turned back into tuples
+def _to_scope(value):
+    if isinstance(value, list):
+        return tuple(_to_scope(v) for v in value)
+    return value
@@ -0,0 +1,110 @@
+"""
+Process-wide, thread-safe LRU cache shared by the retrieval layer
+"""
+
+import hashlib # used to turn a query text into a short, stable key
+import threading # the lock that lets several report threads use the cache at the same time
+from collections import OrderedDict # remembers usage order → lets us evict the least recently used entry
+from concurrent.futures import Future # a value that one thread computes and other threads wait for
+
+
+# Every report thread (see scheduler.py) goes through the same RAG layer, so one object is shared by all of them.
+# Keys are query texts, stored as a blake2b digest: short, fixed size, and the same in every run.
+# All reads and writes happen under one lock, so two threads never see a half-updated cache.
+# get_or_compute / get_or_compute_many are single-flight: while one thread computes a missing value,
+# a Future for it is registered under the lock, and every other thread asking for the same query waits
+# on that Future instead of computing the value again.
+# maxsize: how many entries to remember before the least recently used one is dropped
+class SharedRetrievalCache:
+    """Thread-safe LRU cache keyed by query text"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._d = OrderedDict()
+        # key → Future of a value some thread is computing right now
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query):
+        return hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, query):
+        """Return the cached value for this query text, or None"""
+        k = self._key(query)
+        with self._lock:
+            if k not in self._d:
+                return None
+            self._d.move_to_end(k) # mark as recently used
+            return self._d[k]
+
+    def set(self, query, value):
+        """Store a value for this query text"""
+        with self._lock:
+            self._store(self._key(query), value)
+
+    def _store(self, k, value):
+        self._d[k] = value
+        self._d.move_to_end(k)
+        if len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+
+    def get_or_compute(self, query, compute):
+        """Return the cached value for this query text, computing it with compute(query) if missing"""
+        return self.get_or_compute_many([query], lambda queries: [compute(queries[0])])[0]
+
+    # compute_many(list of query texts) → list of values, one per text, in the same order.
+    # It is called at most once, with only the texts that are neither cached nor being computed by another thread;
+    # the texts another thread is already computing are waited for.
+    # If compute_many fails, the error is raised here and in every thread waiting for those texts.
+    def get_or_compute_many(self, queries, compute_many):
+        """Return one value per query text, computing only the missing ones"""
+        values = [None] * len(queries)
+        owned = {}   # key → (Future, positions in queries) computed by this thread
+        waiting = [] # (position, Future) computed by another thread
+        with self._lock:
+            for i, query in enumerate(queries):
+                k = self._key(query)
+                if k in self._d:
+                    self._d.move_to_end(k)
+                    values[i] = self._d[k]
+                elif k in owned:
+                    owned[k][1].append(i) # the same text twice in this list
+                elif k in self._pending:
+                    waiting.append((i, self._pending[k]))
+                else:
+                    self._pending[k] = Future()
+                    owned[k] = (self._pending[k], [i])
+
+        if owned:
+            keys = list(owned)
+            try:
+                results = list(compute_many([queries[owned[k][1][0]] for k in keys]))
+            except BaseException as e:
+                with self._lock:
+                    for k in keys:
+                        del self._pending[k]
+                for k in keys:
+                    owned[k][0].set_exception(e)
+                raise
+            with self._lock:
+                for k, value in zip(keys, results):
+                    self._store(k, value)
+                    del self._pending[k]
+            for k, value in zip(keys, results):
+                future, positions = owned[k]
+                future.set_result(value)
+                for i in positions:
+                    values[i] = value
+
+        for i, future in waiting:
+            values[i] = future.result()
+        return values
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._d.clear()
+
+    def __len__(self):
+        return len(self._d)
@@ -3,13 +3,61 @@
 from telethon import TelegramClient # use to log in and send messages or files through Telegram account or bot.
 from config import TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_PHONE
 import os
+import asyncio # lets several uploads run at the same time
+import atexit # closes the Telegram connection when the program ends
+import io # in-memory file objects for the uploads
+import threading # runs the Telegram event loop in its own background thread
 
-# Create Telegram Client
+# Telegram Client
 # riteshreport123_session: This is the session name — Telethon uses it to remember our login
 # The first time you run this, Telethon will ask for your phone number and OTP code (sent to Telegram).
 # It will then create a file in your current directory. This file stores your login credentials securely.
-# Next time you run the script, it won’t ask for login again — it will reuse this session. 
-client = TelegramClient('riteshreport123_session', TELEGRAM_API_ID, TELEGRAM_API_HASH)
+# Next time you run the script, it won’t ask for login again — it will reuse this session.
+# The client is created on first use (see _ensure_started), inside the Telegram loop thread below.
+SESSION_NAME = 'riteshreport123_session'
+client = None
+
+# Telethon is built on asyncio: the client and every call on it must run on one event loop.
+# send_to_telegram() is called from APScheduler's worker thread, which has no event loop of its own,
+# so the client gets a dedicated loop running forever in a background (daemon) thread.
+# Every call from normal code hands its coroutine to that loop with asyncio.run_coroutine_threadsafe()
+# and waits for the result — it works the same from the main thread or any worker thread.
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="telegram-loop", daemon=True).start()
+        return _loop
+
+# Runs a coroutine on the Telegram loop thread and returns its result (or raises its exception)
+def _run(coro, timeout=None):
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+# Turns a file path into the name shown in its caption, e.g. "charts/sales_by_region.png" → "Sales By Region".
+# os.path.splitext drops whatever the extension is (.png, .svg, .txt ...); the "_" → " " table is built once, at import time.
+# .title() -> Capitalize each word.
+_UNDERSCORE_TO_SPACE = str.maketrans('_', ' ')
+
+def _caption_name(path):
+    return os.path.splitext(os.path.basename(path))[0].translate(_UNDERSCORE_TO_SPACE).title()
+
+# Reads a whole file as bytes (runs in a worker thread, see _upload)
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# Uploads one file to Telegram's servers and returns the uploaded-file handle; nothing appears in the chat yet.
+# The file is read in a worker thread (asyncio.to_thread), so a slow disk read never
+# blocks the event loop while the other uploads are running; the bytes are then uploaded from memory.
+# Telethon takes the file name shown in the chat from the .name of the in-memory file.
+async def _upload(path):
+    data = io.BytesIO(await asyncio.to_thread(_read_file, path))
+    data.name = os.path.basename(path)
+    return await client.upload_file(data)
 
 # It’s an asynchronous function (uses async because Telethon requires async for network calls).
 # report_files → like ["sales_report.txt", "marketing_report.txt"]
@@ -37,21 +85,23 @@ async def send_telegram_reports(report_files, chart_files):
     
     print("✓ Sent header message")
 
-    # Send charts with captions
-    # .title() -> Capitalize each word. For exapmple: "Sales By Region"
-    # The await keyword is needed because this is an asynchronous operation — it waits until the file is actually sent before moving to the next chart.
-    for chart in chart_files:
-        if os.path.exists(chart):
-            chart_name = os.path.basename(chart).replace('.png', '').replace('_', ' ').title()
-            await client.send_file(TELEGRAM_PHONE, chart, caption=f"📈 {chart_name}")
-            print(f"✓ Sent {os.path.basename(chart)}")
-    
-     # Send reports with captions
-    for report in report_files:
-        if os.path.exists(report):
-            report_name = os.path.basename(report).replace('.txt', '').replace('_', ' ').title()
-            await client.send_file(TELEGRAM_PHONE, report, caption=f"📄 {report_name}")
-            print(f"✓ Sent {os.path.basename(report)}")
+    # Send charts and reports with captions
+    # Every file is uploaded at once with asyncio.gather(). Each upload mostly waits on the network,
+    # so they overlap on the one Telegram connection: the uploads take about as long as the slowest file
+    # instead of the sum of all files.
+    # The messages are then sent one by one from the uploaded handles (quick, no file data left to send),
+    # so the chat still shows the charts in order, then the reports in order, whichever upload finished first.
+    # Missing files are filtered out once, up front (isfile also skips folders), so the upload list is plain data.
+    valid_charts = [chart for chart in chart_files if os.path.isfile(chart)]
+    valid_reports = [report for report in report_files if os.path.isfile(report)]
+
+    uploads = [(chart, f"📈 {_caption_name(chart)}") for chart in valid_charts]
+    uploads += [(report, f"📄 {_caption_name(report)}") for report in valid_reports]
+
+    handles = await asyncio.gather(*[_upload(path) for path, _ in uploads])
+    for (path, caption), handle in zip(uploads, handles):
+        await client.send_file(TELEGRAM_PHONE, handle, caption=caption)
+        print(f"✓ Sent {os.path.basename(path)}")
     
     
     # Send footer message
@@ -63,23 +113,54 @@ async def send_telegram_reports(report_files, chart_files):
     
     print("\n✓ All files sent to Telegram!\n")
 
+# Creates the client (once) and connects + logs in only if it is not connected yet.
+# It runs on the Telegram loop thread, so the client is created on — and bound to — that loop.
+# The scheduler process keeps running day after day, so the connection made for the first report
+# is reused for every later one — no new connect + login handshake each day.
+# client.start() reuses the saved session file, so it only asks for the phone/OTP the very first time.
+async def _ensure_started():
+    global client
+    if client is None:
+        client = TelegramClient(SESSION_NAME, TELEGRAM_API_ID, TELEGRAM_API_HASH)
+    if not client.is_connected():
+        await client.start()
+
+async def _disconnect():
+    if client is not None and client.is_connected():
+        await client.disconnect()
+
+# Closes the Telegram connection once, when the program exits, and then stops the loop thread.
+# The timeout keeps a dead connection from blocking the exit.
+@atexit.register
+def _disconnect_client():
+    global _loop
+    if _loop is None:
+        return
+    try:
+        _run(_disconnect(), timeout=10)
+    except Exception as e:
+        print(f"Could not close the Telegram connection: {e}")
+    _loop.call_soon_threadsafe(_loop.stop)
+    _loop = None
+
+async def _start_and_send(report_files, chart_files):
+    await _ensure_started()
+    await send_telegram_reports(report_files, chart_files)
+
 # It is a wrapper function — meaning it’s a simple helper that lets you call send_to_telegram() normally, even though the real sending function (send_telegram_reports) is asynchronous (async).
-# client is your Telegram connection
-# The with block:
-    #1. Automatically starts and closes the Telegram connection properly.
-    #2. You don’t need to manually call client.start() or client.disconnect()
+# client is your Telegram connection, kept open between calls by _ensure_started()
 # Normally, to call an async function (like send_telegram_reports), you must use await, but that only works inside another async function.
 # Since send_to_telegram is a regular function (not async), we can’t use await directly.
-# So instead, we use: client.loop.run_until_complete(...)
+# So instead, we use: _run(...), which runs it on the Telegram loop thread and waits until it is done
 def send_to_telegram(report_files, chart_files):
     """Wrapper function to send reports"""
-    with client:
-        client.loop.run_until_complete(send_telegram_reports(report_files, chart_files))
+    _run(_start_and_send(report_files, chart_files))
 
 # The word async means this is an asynchronous function — it can pause and wait for Telegram actions to finish (like sending a message).
 # await → tells Python to “wait” until the message is completely sent before moving to the next line.
 async def test_telegram():
     """Test Telegram connection"""
+    await _ensure_started()
     await client.send_message(TELEGRAM_PHONE, 
         '🚀 Test Message from Report System!\n\n'
         'If you see this, Telegram integration is working perfectly! ✅'
@@ -92,5 +173,4 @@ if __name__ == "__main__":
     print("Testing Telegram connection...")
     print(f"Sending to: {TELEGRAM_PHONE}")
 
-    with client:
-        client.loop.run_until_complete(test_telegram())
\ No newline at end of file
+    _run(test_telegram())
\ No newline at end of file
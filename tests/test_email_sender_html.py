@@ -0,0 +1,88 @@
+"""Tests for the MIME part cache in email_sender_html"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import email_sender_html
+
+
+class MimePartCacheTest(unittest.TestCase):
+    def setUp(self):
+        email_sender_html._mime_cache.clear()
+        self.addCleanup(email_sender_html._mime_cache.clear)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        # Counts how often a part is built from the file's bytes (i.e. the cache missed)
+        self.built = []
+
+        def make_part(data):
+            self.built.append(data)
+            return email_sender_html._make_report_part(data)
+
+        self.make_part = make_part
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _load(self, *paths):
+        return email_sender_html.load_mime_parts(list(paths), self.make_part)
+
+    def test_cache_hit_returns_a_copy(self):
+        path = self._write("report.txt", b"report")
+
+        [(_, first)] = self._load(path)
+        first.add_header("Content-Disposition", "attachment", filename="report.txt")
+        [(_, second)] = self._load(path)
+
+        self.assertEqual(len(self.built), 1)
+        self.assertIsNot(first, second)
+        self.assertIsNone(second["Content-Disposition"])
+
+    def test_size_change_rebuilds_the_part(self):
+        path = self._write("report.txt", b"report")
+        self._load(path)
+        self._write("report.txt", b"a longer report")
+        self._load(path)
+
+        self.assertEqual(self.built, [b"report", b"a longer report"])
+
+    def test_mtime_change_rebuilds_the_part(self):
+        path = self._write("report.txt", b"report")
+        self._load(path)
+        self._write("report.txt", b"REPORT")  # same size
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self._load(path)
+
+        self.assertEqual(self.built, [b"report", b"REPORT"])
+
+    def test_lru_limit_is_enforced(self):
+        paths = [self._write(f"report_{i}.txt", f"report {i}".encode()) for i in range(3)]
+
+        with mock.patch.object(email_sender_html, "_MIME_CACHE_SIZE", 2):
+            parts = self._load(*paths)
+
+        # every file is still in this email, but only the two most recent stay cached
+        self.assertEqual([path for path, _ in parts], paths)
+        self.assertEqual(
+            list(email_sender_html._mime_cache),
+            [os.path.abspath(path) for path in paths[1:]],
+        )
+
+    def test_missing_files_are_skipped(self):
+        path = self._write("report.txt", b"report")
+        parts = self._load(os.path.join(self.tmp.name, "missing.txt"), path)
+        self.assertEqual([p for p, _ in parts], [path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Checks that every prompt starts with its fixed instructions and ends with the parts that change"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import autogen
+except ImportError:
+    autogen = None
+
+
+@unittest.skipIf(autogen is None, "autogen is not installed")
+class PromptPrefixTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import agent
+
+        cls.agent = agent
+
+    # Everything before the query must be identical for any query and data, so OpenAI can reuse it
+    def assertFixedPrefix(self, build):
+        first = build("Analyze sales performance in Europe", "1. [SALES] Europe record")
+        second = build("Analyze marketing campaign performance", "1. [MARKETING] Email record")
+        prefix = first.split("Analyze sales performance in Europe", 1)[0]
+        self.assertTrue(prefix.strip())
+        self.assertTrue(second.startswith(prefix))
+        self.assertTrue(first.endswith("1. [SALES] Europe record"))
+
+    def test_analysis_prompt(self):
+        self.assertFixedPrefix(self.agent.build_analysis_prompt)
+
+    def test_report_prompt(self):
+        self.assertFixedPrefix(self.agent.build_report_prompt)
+
+    def test_fused_report_prompt(self):
+        self.assertFixedPrefix(self.agent.build_fused_report_prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Calibration tests for the relevance score against the real embedding model"""
+import json
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import chromadb
+except ImportError:
+    chromadb = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+UNRELATED_TEXT = "The recipe calls for two cups of flour, a pinch of salt and one egg."
+
+
+@unittest.skipIf(chromadb is None, "chromadb is not installed")
+class RelevanceCalibrationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from config import get_settings
+        from vector_db import HNSW_SPACE, distance_to_relevance, get_embedding_function
+
+        cls.min_relevance = get_settings().min_relevance
+        cls.distance_to_relevance = staticmethod(distance_to_relevance)
+        cls.embedding_function = get_embedding_function()
+        # The ONNX model is downloaded on first use
+        try:
+            cls.embedding_function(["warmup"])
+        except Exception as e:
+            raise unittest.SkipTest(f"embedding model is not available: {e}")
+
+        with open(os.path.join(DATA_DIR, "sales_data.json")) as f:
+            cls.sales_docs = [record["description"] for record in json.load(f)[:50]]
+
+        # Same embedding model and distance space as the real collection, but in memory
+        client = chromadb.EphemeralClient()
+        cls.collection = client.create_collection(
+            name="relevance_calibration",
+            embedding_function=cls.embedding_function,
+            metadata={"hnsw:space": HNSW_SPACE},
+        )
+        documents = cls.sales_docs + [UNRELATED_TEXT]
+        cls.collection.add(documents=documents, ids=[f"doc_{i}" for i in range(len(documents))])
+
+    def _relevances(self, query):
+        results = self.collection.query(query_texts=[query], n_results=self.collection.count(), include=["documents", "distances"])
+        return {
+            doc: self.distance_to_relevance(distance)
+            for doc, distance in zip(results["documents"][0], results["distances"][0])
+        }
+
+    def test_relevance_equals_cosine_similarity(self):
+        query = "Analyze sales performance"
+        query_vec, doc_vec = np.asarray(self.embedding_function([query, self.sales_docs[0]]), dtype=np.float64)
+        cosine = query_vec @ doc_vec / (np.linalg.norm(query_vec) * np.linalg.norm(doc_vec))
+        self.assertAlmostEqual(self._relevances(query)[self.sales_docs[0]], cosine, places=4)
+
+    def test_related_documents_pass_min_relevance(self):
+        relevances = self._relevances("Analyze sales performance of products by revenue and units sold")
+        best_sales = max(relevances[doc] for doc in self.sales_docs)
+        self.assertGreaterEqual(best_sales, self.min_relevance)
+
+    def test_unrelated_text_is_filtered_out(self):
+        relevances = self._relevances("Analyze sales performance of products by revenue and units sold")
+        self.assertLess(relevances[UNRELATED_TEXT], self.min_relevance)
+
+
+if __name__ == "__main__":
+    unittest.main()
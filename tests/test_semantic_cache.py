@@ -0,0 +1,122 @@
+"""Tests for the semantic retrieval cache"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_cache import SemanticCache, query_slots
+
+try:
+    import chromadb
+except ImportError:
+    chromadb = None
+
+
+# The results a Chroma query returns for one query
+def _results(doc):
+    return {"documents": [[doc]], "metadatas": [[{"type": "sales"}]], "distances": [[np.float32(0.25)]]}
+
+
+class SaveLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "semantic_cache")
+        self.embedding = np.random.default_rng(0).standard_normal(384)
+
+    def test_entries_survive_a_round_trip(self):
+        cache = SemanticCache(ttl=3600)
+        cache.set(self.embedding, _results("Q3 sales"), scope=("sales", 8))
+        cache.save(self.path)
+
+        loaded = SemanticCache(ttl=3600)
+        loaded.load(self.path)
+        self.assertEqual(loaded.get(self.embedding, scope=("sales", 8))["documents"], [["Q3 sales"]])
+        self.assertIsNone(loaded.get(self.embedding, scope=("marketing", 8)))
+
+    def test_files_are_not_pickles(self):
+        SemanticCache().save(self.path)
+        self.assertTrue(os.path.exists(self.path + ".npz"))
+        self.assertTrue(os.path.exists(self.path + ".json"))
+        np.load(self.path + ".npz", allow_pickle=False).close()
+
+    def test_expired_entries_are_not_loaded(self):
+        cache = SemanticCache(ttl=3600)
+        cache.set(self.embedding, _results("Q3 sales"), scope=("sales", 8))
+        cache.save(self.path)
+
+        loaded = SemanticCache(ttl=-1)
+        loaded.load(self.path)
+        self.assertEqual(len(loaded), 0)
+
+    def test_missing_files_are_ignored(self):
+        cache = SemanticCache()
+        cache.load(self.path)
+        self.assertEqual(len(cache), 0)
+
+
+class QuerySlotsTest(unittest.TestCase):
+    def test_region_variants_have_different_slots(self):
+        self.assertNotEqual(
+            query_slots("Analyze sales performance in North America"),
+            query_slots("Analyze sales performance in Europe"),
+        )
+
+    def test_template_words_are_not_slots(self):
+        self.assertEqual(query_slots("Analyze marketing campaign performance"), ())
+        self.assertEqual(query_slots("Analyze sales performance for Q3 2024"), ("2024", "q3"))
+
+
+# Two region-only variants of one query template, embedded as the same vector
+# (the worst case of "cosine similarity above the threshold")
+@unittest.skipIf(chromadb is None, "chromadb is not installed")
+class RegionVariantsTest(unittest.TestCase):
+    def setUp(self):
+        import rag_retrieval
+
+        self.rag = rag_retrieval
+        self.rag._semantic_cache.clear()
+        self.addCleanup(self.rag._semantic_cache.clear)
+
+        embedding = np.ones(384, dtype=np.float32)
+        searched = []
+
+        def fake_query(collection, query, n_results=5, filter_dict=None, query_embedding=None):
+            searched.append(query)
+            return _results(f"documents for {query}")
+
+        self.searched = searched
+        for name, value in (
+            ("_embed", lambda query: embedding),
+            ("_embed_many", lambda queries: [embedding for _ in queries]),
+            ("_search_collection", lambda search: search(None)),
+            ("query_vectordb", fake_query),
+        ):
+            patcher = mock.patch.object(self.rag, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_region_variants_do_not_share_results(self):
+        north_america = "Analyze sales performance in North America"
+        europe = "Analyze sales performance in Europe"
+
+        self.rag.retrieve_relevant_context(north_america, n_results=8, filter_type="sales")
+        results = self.rag.retrieve_relevant_context(europe, n_results=8, filter_type="sales")
+
+        self.assertEqual(results["documents"], [[f"documents for {europe}"]])
+        self.assertEqual(self.searched, [north_america, europe])
+
+    def test_same_query_is_served_from_the_cache(self):
+        query = "Analyze sales performance in Europe"
+        self.rag.retrieve_relevant_context(query, n_results=8, filter_type="sales")
+        self.rag.retrieve_relevant_context(query, n_results=8, filter_type="sales")
+        self.assertEqual(self.searched, [query])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Tests for telegram_sender: sending from a thread without an event loop (like APScheduler's worker)"""
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+UPLOAD_DELAYS = {"chart_a.png": 0.05, "chart_b.png": 0.03, "daily_sales_report.txt": 0.01}
+
+
+# Stands in for telethon.TelegramClient: records which thread each call ran on, and no network is used
+class FakeTelegramClient:
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+        self.sent_files = []
+        self.connected = False
+
+    def _record(self, name):
+        self.calls.append((name, threading.current_thread().name))
+
+    def is_connected(self):
+        return self.connected
+
+    async def start(self):
+        self._record("start")
+        self.connected = True
+
+    async def disconnect(self):
+        self._record("disconnect")
+        self.connected = False
+
+    async def send_message(self, entity, message):
+        self._record("send_message")
+
+    # Files listed earlier take longer, so the uploads finish in reverse order
+    async def upload_file(self, file):
+        self._record("upload_file")
+        await asyncio.sleep(UPLOAD_DELAYS.get(file.name, 0))
+        return file.name
+
+    async def send_file(self, entity, file, caption=None):
+        self._record("send_file")
+        self.sent_files.append(file)
+
+
+class SendFromWorkerThreadTest(unittest.TestCase):
+    def setUp(self):
+        fake_telethon = types.ModuleType("telethon")
+        fake_telethon.TelegramClient = FakeTelegramClient
+        patcher = mock.patch.dict(sys.modules, {"telethon": fake_telethon})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sys.modules.pop("telegram_sender", None)
+        self.telegram_sender = importlib.import_module("telegram_sender")
+        self.addCleanup(self.telegram_sender._disconnect_client)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.report = os.path.join(self.tmp.name, "daily_sales_report.txt")
+        with open(self.report, "w") as f:
+            f.write("report")
+
+    def _send_in_thread(self):
+        errors = []
+
+        def target():
+            try:
+                self.telegram_sender.send_to_telegram([self.report], [])
+            except Exception as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=target, name="scheduler-worker")
+        worker.start()
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive(), "send_to_telegram did not finish")
+        self.assertEqual(errors, [])
+
+    def test_send_from_non_main_thread(self):
+        self._send_in_thread()
+
+        client = self.telegram_sender.client
+        self.assertEqual(
+            [name for name, _ in client.calls],
+            ["start", "send_message", "upload_file", "send_file", "send_message"],
+        )
+        # every Telethon call ran on the one dedicated loop thread
+        self.assertEqual({thread for _, thread in client.calls}, {"telegram-loop"})
+
+    def test_connection_is_reused_across_threads(self):
+        self._send_in_thread()
+        self._send_in_thread()
+
+        calls = [name for name, _ in self.telegram_sender.client.calls]
+        self.assertEqual(calls.count("start"), 1)
+        self.assertEqual(calls.count("send_file"), 2)
+
+
+    def test_files_are_sent_in_order(self):
+        charts = []
+        for name in ("chart_a.png", "chart_b.png"):
+            charts.append(os.path.join(self.tmp.name, name))
+            with open(charts[-1], "wb") as f:
+                f.write(b"png")
+
+        self.telegram_sender.send_to_telegram([self.report], charts)
+
+        self.assertEqual(
+            self.telegram_sender.client.sent_files,
+            ["chart_a.png", "chart_b.png", "daily_sales_report.txt"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
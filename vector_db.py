@@ -1,95 +1,265 @@
 """
 ChromaDB vector database setup and operations
 """
+import os
 import chromadb # the main library used to create and manage a vector database
+import chromadb.errors # the exceptions Chroma raises (e.g. for a missing collection)
 from chromadb.config import Settings # helps configure the database
+from chromadb.utils import embedding_functions # the model that turns text into vectors
 import json # used to handle JSON data
+from itertools import chain, islice, repeat # used to feed the data to ChromaDB in batches
+from operator import itemgetter # picks several fields out of a record in one call
+import pandas as pd # the data can also be passed as DataFrames
 from config import CHROMA_DB_PATH, COLLECTION_NAME # these tell the program where to store the database and what to name it
 
 
+_embedding_function = None
+
+# HNSW search width (ef): how many candidate neighbours Chroma looks at per query.
+# A wider search finds the truly closest documents more reliably (better recall), which costs a little
+# compute here but saves LLM tokens wasted on irrelevant chunks. Chroma's default is 100; 128 searches wider.
+# It is set when a collection is created and also applied to an existing collection when it is opened
+# (see _apply_search_ef), so collections created before this setting get it too.
+HNSW_SEARCH_EF = 128
+
+# Distance used by the index. "l2" (Chroma's default) returns the *squared* Euclidean distance.
+# It is set explicitly when the collection is created, so distance_to_relevance() always knows which formula applies.
+HNSW_SPACE = "l2"
+
+# Turns a Chroma distance into a relevance score between 0 and 1 (the cosine similarity of query and document).
+# The embedding model returns vectors of length 1, and for those the squared L2 distance is d = 2 - 2·cos,
+# so cos = 1 - d/2. A plain 1 - d would make min_relevance 0.3 actually demand cos ≥ 0.65.
+# For the "cosine" space Chroma already returns d = 1 - cos.
+def distance_to_relevance(distance, space=HNSW_SPACE):
+    """Convert a Chroma distance into cosine similarity"""
+    if space == "l2":
+        return 1 - distance / 2
+    return 1 - distance
+
+# Returns the embedding model used by the collection.
+# It is created only once and shared, so the RAG layer can embed a query itself
+# (e.g. for the semantic cache) with exactly the same model Chroma uses.
+def get_embedding_function():
+    """Return the shared embedding function"""
+    global _embedding_function
+    if _embedding_function is None:
+        _embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    return _embedding_function
+
+def embed_query(query_text):
+    """Embed a single query string"""
+    return get_embedding_function()([query_text])[0]
+
+# Embeds several queries in one call — the model processes them as a single batch
+def embed_queries(query_texts):
+    """Embed a list of query strings"""
+    return list(get_embedding_function()(list(query_texts)))
+
+
+# The open (client, collection) pair, kept for the whole process together with the process id.
+# Opening the PersistentClient loads the database files and the HNSW index, so it is done only once;
+# every later initialize_chromadb() call returns the same pair. The pid check makes a forked
+# child process open its own client instead of reusing the parent's.
+_chroma = None
+
+# Raised by client.get_collection() when the collection does not exist yet.
+# The exception class differs between Chroma versions, so every one this version has is caught.
+# Older versions raise a plain ValueError instead; _get_existing_collection handles that case by its message.
+_MISSING_COLLECTION_ERRORS = tuple(
+    getattr(chromadb.errors, name)
+    for name in ("NotFoundError", "InvalidCollectionException")
+    if hasattr(chromadb.errors, name)
+)
+
+# Errors that mean the open collection handle is no longer usable: the collection was deleted
+# (and maybe re-created) since it was opened, or the connection to the database was lost.
+# Re-opening with reset_chromadb() + initialize_chromadb() fixes these; any other error is a real failure.
+# Plain ValueError is not in either tuple: a bad `where` filter or a wrong embedding size raise it too,
+# and re-opening the database would only run the same failing search again.
+STALE_COLLECTION_ERRORS = _MISSING_COLLECTION_ERRORS + (ConnectionError,)
+
+# Sets the search width (HNSW_SEARCH_EF) on an already existing collection.
+# Newer Chroma versions keep the HNSW settings in the collection's configuration;
+# older ones (without a configuration argument) keep them in the collection metadata.
+def _apply_search_ef(collection):
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": HNSW_SEARCH_EF}})
+    except TypeError:
+        metadata = dict(collection.metadata or {})
+        if metadata.get("hnsw:search_ef") != HNSW_SEARCH_EF:
+            metadata["hnsw:search_ef"] = HNSW_SEARCH_EF
+            collection.modify(metadata=metadata)
+
+# Returns the collection if it already exists, or None if it doesn't.
+# Only "collection does not exist" is turned into None; every other error is raised.
+def _get_existing_collection(client):
+    try:
+        return client.get_collection(name=COLLECTION_NAME, embedding_function=get_embedding_function())
+    except _MISSING_COLLECTION_ERRORS:
+        return None
+    except ValueError as e:
+        if "does not exist" in str(e):
+            return None
+        raise
+
 # Creates a database client that connects to your ChromaDB folder.
 # PersistentClient means it will save data permanently (not just in memory).
 def initialize_chromadb():
     """Initialize ChromaDB client and collection"""
+    global _chroma
+    if _chroma is not None and _chroma[0] == os.getpid():
+        return _chroma[1], _chroma[2]
+
     client = chromadb.PersistentClient(
         path = CHROMA_DB_PATH,
         settings = Settings(anonymized_telemetry=False)
     )
 
     # Get or create collection
-    try:
-        collection = client.get_collection(name=COLLECTION_NAME)
+    collection = _get_existing_collection(client)
+    if collection is not None:
+        # Outside the lookup above: an error from modify() is a real failure, not a missing collection
+        _apply_search_ef(collection)
         print(f"Loaded existing collection: {COLLECTION_NAME}")
-    except:
+    else:
         collection = client.create_collection(
             name=COLLECTION_NAME,
-            metadata = {"description": "Sales and marketing data for report generation"}
+            embedding_function=get_embedding_function(),
+            metadata = {
+                "description": "Sales and marketing data for report generation",
+                "hnsw:space": HNSW_SPACE,
+                "hnsw:search_ef": HNSW_SEARCH_EF
+            }
         )
         print(f"Created new collection: {COLLECTION_NAME}")
-    
+
+    _chroma = (os.getpid(), client, collection)
     return client, collection
 
+# Forgets the open client/collection, so the next initialize_chromadb() opens them again
+# (e.g. after the collection was deleted and re-created).
+def reset_chromadb():
+    """Drop the cached ChromaDB client and collection"""
+    global _chroma
+    _chroma = None
+
+# Runs one tiny search so the first real report doesn't pay the start-up cost:
+# Chroma loads the HNSW index lazily on the first query, and the embedding model is loaded
+# on its first use. Doing it here (at scheduler start) moves that wait out of the report run.
+def warmup_vectordb():
+    """Open the collection and run a throwaway query to load the index"""
+    _, collection = initialize_chromadb()
+    if collection.count() == 0:
+        return  # empty collection → nothing to load
+    collection.query(query_texts=["warmup"], n_results=1, include=["distances"])
+
+# How many documents are embedded and added to ChromaDB per collection.add() call.
+# Only one batch is held in memory at a time, so loading cost stays flat as the data grows.
+LOAD_BATCH_SIZE = 256
+
+# Metadata fields stored for each record type (in this order), and which of them are numbers.
+# ChromaDB metadata is kept as text, so the numeric columns are converted with str().
+SALES_FIELDS = ("id", "product", "category", "revenue", "units_sold", "region", "quarter", "customer_segment", "sales_rep")
+SALES_NUMERIC = {"revenue", "units_sold"}
+MARKETING_FIELDS = ("id", "campaign_name", "channel", "budget", "impressions", "clicks", "conversions", "quarter", "target_segment")
+MARKETING_NUMERIC = {"budget", "impressions", "clicks", "conversions"}
+
+# Cuts any iterable into lists of at most `size` items (the last one may be shorter)
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+# Turns the raw records into (documents, metadatas, ids) batches of at most LOAD_BATCH_SIZE.
+# Per batch the records are first split into columns (one tuple per field, via itemgetter + zip),
+# each numeric column is converted to text in one map(str, ...) call,
+# and the metadata dicts are then built by zipping the columns back together row by row.
+def _record_batches(records, doc_type, fields, numeric_fields):
+    if isinstance(records, pd.DataFrame):
+        yield from _frame_batches(records, doc_type, fields, numeric_fields)
+        return
+
+    get_row = itemgetter(*fields)
+    get_description = itemgetter("description")
+    keys = ("type",) + fields
+    id_column = fields.index("id")
+
+    for chunk in _batched(records, LOAD_BATCH_SIZE):
+        columns = list(zip(*map(get_row, chunk)))
+        for i, field in enumerate(fields):
+            if field in numeric_fields:
+                columns[i] = list(map(str, columns[i]))
+
+        documents = list(map(get_description, chunk))
+        metadatas = [dict(zip(keys, row)) for row in zip(repeat(doc_type), *columns)]
+        ids = [f"{doc_type}_{record_id}" for record_id in columns[id_column]]
+        yield documents, metadatas, ids
+
+# Same batches, built from a pandas DataFrame (one column per field):
+# numeric columns are turned into text for the whole batch at once with astype(str),
+# and .tolist() hands back plain Python values, which is what Chroma metadata accepts.
+def _frame_batches(frame, doc_type, fields, numeric_fields):
+    keys = ("type",) + fields
+
+    for start in range(0, len(frame), LOAD_BATCH_SIZE):
+        chunk = frame.iloc[start:start + LOAD_BATCH_SIZE]
+        columns = [
+            chunk[field].astype(str).tolist() if field in numeric_fields else chunk[field].tolist()
+            for field in fields
+        ]
+
+        documents = chunk["description"].tolist()
+        metadatas = [dict(zip(keys, row)) for row in zip(repeat(doc_type), *columns)]
+        ids = [f"{doc_type}_{record_id}" for record_id in columns[fields.index("id")]]
+        yield documents, metadatas, ids
+
+# sales_data / marketing_data: a list of record dicts (as loaded from the JSON files) or a pandas DataFrame
+def iter_sales(sales_data):
+    """Yield (documents, metadatas, ids) batches for the sales records"""
+    return _record_batches(sales_data, "sales", SALES_FIELDS, SALES_NUMERIC)
+
+def iter_marketing(marketing_data):
+    """Yield (documents, metadatas, ids) batches for the marketing campaigns"""
+    return _record_batches(marketing_data, "marketing", MARKETING_FIELDS, MARKETING_NUMERIC)
+
 def load_data_to_vectordb(collection, sales_data, marketing_data):
     """Load Sales and Marketing data into VectorDB"""
-    documents = []
-    metadatas = []
-    ids = []
-
-    # Process Sales data
-    for sale in sales_data:
-        doc_text = sale["description"]
-        documents.append(doc_text)
-        metadatas.append({
-            "type": "sales",
-            "id": sale["id"],
-            "product": sale["product"],
-            "category": sale["category"],
-            "revenue": str(sale["revenue"]),
-            "units_sold": str(sale["units_sold"]),
-            "region": sale["region"],
-            "quarter": sale["quarter"],
-            "customer_segment": sale["customer_segment"],
-            "sales_rep": sale["sales_rep"]
-        })
-        ids.append(f"sales_{sale['id']}")
-
-    # Process marketing data
-    for campaign in marketing_data:
-        doc_text = campaign["description"]
-        documents.append(doc_text)
-        metadatas.append({
-            "type": "marketing",
-            "id": campaign["id"],
-            "campaign_name": campaign["campaign_name"],
-            "channel": campaign["channel"],
-            "budget": str(campaign["budget"]),
-            "impressions": str(campaign["impressions"]),
-            "clicks": str(campaign["clicks"]),
-            "conversions": str(campaign["conversions"]),
-            "quarter": campaign["quarter"],
-            "target_segment": campaign["target_segment"]
-        })
-        ids.append(f"marketing_{campaign['id']}")
-
-    # Add document to collection
-    collection.add(
-        documents = documents,
-        metadatas = metadatas,
-        ids = ids
-    )
+    total = 0
+
+    # Sales records first, then marketing, added at most LOAD_BATCH_SIZE documents at a time
+    for documents, metadatas, ids in chain(iter_sales(sales_data), iter_marketing(marketing_data)):
+        # Add document to collection
+        collection.add(
+            documents = documents,
+            metadatas = metadatas,
+            ids = ids
+        )
+        total += len(documents)
+        print(f"  Added {total} documents...")
 
-    print(f"Loaded {len(documents)} documents into ChromaDB")
-    return len(documents)
+    print(f"Loaded {total} documents into ChromaDB")
 
-def query_vectordb(collection, query_text, n_results=5, filter_dict=None):
+    # The cached retrieval results were built from the old data, so they are all thrown away.
+    # Imported here because rag_retrieval itself imports this module.
+    from rag_retrieval import clear_retrieval_caches
+    clear_retrieval_caches()
+    return total
+
+def query_vectordb(collection, query_text, n_results=5, filter_dict=None, query_embedding=None):
     '''This function searches the vector database'''
     # query_text is what you want to search for (e.g., “best performing product”)
     # n_results is how many top matches you want back.
     # filter_dict lets you limit by metadata (e.g., only “sales” type)
+    # query_embedding: if the query was already embedded, pass it here so Chroma doesn't embed it again
+    # include → only bring back what the RAG layer uses; embeddings are the largest column and are never needed here
     query_params = {
-        "query_texts": [query_text],
-        "n_results": n_results
+        "n_results": n_results,
+        "include": ["documents", "metadatas", "distances"]
     }
+    if query_embedding is not None:
+        query_params["query_embeddings"] = [[float(x) for x in query_embedding]]
+    else:
+        query_params["query_texts"] = [query_text]
     if filter_dict:
         query_params["where"] = filter_dict
 
@@ -97,6 +267,20 @@ def query_vectordb(collection, query_text, n_results=5, filter_dict=None):
 
     return results
 
+# Searches for several already-embedded queries in ONE Chroma call (one index pass for the whole batch).
+# All queries share the same n_results and filter; the result lists have one row per query.
+def query_vectordb_batch(collection, query_embeddings, n_results=5, filter_dict=None):
+    """Search the vector database for several query embeddings at once"""
+    query_params = {
+        "query_embeddings": [[float(x) for x in emb] for emb in query_embeddings],
+        "n_results": n_results,
+        "include": ["documents", "metadatas", "distances"]
+    }
+    if filter_dict:
+        query_params["where"] = filter_dict
+
+    return collection.query(**query_params)
+
 def get_collection_stats(collection):
     """Get statistics about the collection"""
     # Counts how many documents are in the collection.
@@ -112,6 +296,7 @@ def clear_collection(client, collection_name):
     # If it doesn’t exist → prints a message
     try:
         client.delete_collection(name=collection_name)
+        reset_chromadb() # the cached collection handle now points at a deleted collection
         print(f"Deleted collection: {collection_name}")
     except:
         print(f"Collection {collection_name} does not exist")
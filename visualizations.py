@@ -1,71 +1,273 @@
 """
 Create beautiful visualizations for sales and marketing data using matplotlib
 """
-import json # It helps you read and write data in JSON format (JavaScript Object Notation)
-import matplotlib.pyplot as plt # used for creating visualizations like bar charts, line charts, pie charts, etc.
-import matplotlib.patches as mpatches # provides shapes like rectangles, circles, and legends.
-from matplotlib import rcParams # This lets you control global style settings for all charts — like fonts, colors, figure sizes, etc
+import orjson # It helps you read data in JSON format (JavaScript Object Notation) — a fast drop-in for the json module
 import numpy as np # used for working with numbers and arrays efficiently.
-
-plt.style.use("seaborn-v0_8-darkgrid") # adds a soft grey grid background behind plots.
-rcParams['font.family'] = 'sans-serif' # sets the default font family for all text in the charts (like labels and titles)
-rcParams['font.sans-serif'] = ['Arial'] # This specifies which sans-serif font to use.
-rcParams['figure.facecolor'] = 'white' # sets the background color of your entire figure (chart area) to white
-
+import pandas as pd # used to group and add up the data by column.
+import os # used to count the CPU cores and to check for existing chart files.
+import multiprocessing # the "spawn" start method for the optional worker processes.
+import functools # keeps the chart functions' names when they are wrapped (see _styled).
+import hashlib # fingerprints the JSON files, so unchanged data doesn't redraw its charts.
+from collections import namedtuple # a small tuple type with named fields for the precomputed sales totals.
+from concurrent.futures import ProcessPoolExecutor # optionally builds the charts in parallel worker processes.
+
+# matplotlib is imported only when the first chart is actually drawn (see _init_mpl).
+# Importing it loads the font cache, the style sheets and a drawing backend, which takes a noticeable
+# moment — and a process that only loads data, or finds every chart already up to date, never needs it.
+plt = None # matplotlib.pyplot: used for creating visualizations like bar charts, line charts, pie charts, etc.
+mpatches = None # matplotlib.patches: provides shapes like rectangles, circles, and legends.
+mcollections = None # matplotlib.collections: draws many shapes together as one artist.
+_DOLLAR_FMT = None # the dollar axis formatter, see _init_mpl
+Image = None # PIL.Image: writes the finished chart pixels as a PNG file.
+
+# Imports matplotlib once per process (the chart worker processes each do it for themselves).
+def _init_mpl():
+    global plt, mpatches, mcollections, _DOLLAR_FMT, Image
+    if plt is not None:
+        return
+
+    # Agg draws straight to image files — no window/GUI backend is looked for or started
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as pyplot
+    import matplotlib.patches as patches
+    import matplotlib.collections as collections
+    from matplotlib.ticker import FuncFormatter # turns axis numbers into custom text (here: dollar amounts)
+    from PIL import Image as pil_image
+
+    # Formats axis numbers to look like money, e.g. 100000 → $100,000.
+    # Created once and reused by every chart that has a dollar axis.
+    _DOLLAR_FMT = FuncFormatter(lambda x, _: f'${x:,.0f}')
+
+    plt, mpatches, mcollections, Image = pyplot, patches, collections, pil_image
+
+# The look shared by all charts. It is not written into matplotlib's global settings (rcParams):
+# every chart function is wrapped in @_styled, which switches this style on only while that chart is
+# drawn and saved, and puts the previous settings back afterwards.
+# A style can be a named style sheet or a dict of settings; they are applied in this order.
+CHART_STYLE = [
+    "seaborn-v0_8-darkgrid", # adds a soft grey grid background behind plots.
+    {
+        'font.family': 'sans-serif', # sets the default font family for all text in the charts (like labels and titles)
+        'font.sans-serif': ['Arial'], # This specifies which sans-serif font to use.
+        'figure.facecolor': 'white', # sets the background color of your entire figure (chart area) to white
+        # No chart uses the top and right frame lines (this style draws them 0 wide anyway), so every new axes
+        # leaves them out from the start — nothing to hide per chart, and two fewer spines to draw on every axes.
+        'axes.spines.top': False,
+        'axes.spines.right': False,
+    },
+]
+
+# Decorator for the chart functions: sets up matplotlib if needed and draws the chart inside CHART_STYLE.
+# functools.wraps keeps the function's name, so the worker processes of generate_all_charts(parallel=True) can still find it.
+def _styled(builder):
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        _init_mpl()
+        with plt.style.context(CHART_STYLE):
+            return builder(*args, **kwargs)
+    return wrapper
+
+# The JSON file behind each kind of data
+DATA_FILES = {"sales": "data/sales_data.json", "marketing": "data/marketing_data.json"}
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# Parses the JSON bytes with orjson — a much faster JSON parser than the built-in json module —
+# and turns the list of records into a DataFrame: one column (a contiguous typed array) per field,
+# so the charts read whole columns instead of looking up one key in every record.
+# source → "sales" or "marketing"; some columns the charts need are worked out here, once, right after loading.
+def _parse(source, raw):
+    frame = pd.DataFrame(orjson.loads(raw))
+    if source == "marketing":
+        # Campaign names cut to their first 25 characters (the ROI chart's x-axis labels),
+        # done for the whole column in one vectorized string step
+        frame["campaign_short"] = frame["campaign_name"].str.slice(0, 25)
+    return frame
+
+# Parquet snapshot of each loaded DataFrame, next to its JSON file (data/sales_data.json → data/sales_data.parquet).
+# Reading the typed columns back from parquet is much faster than parsing the JSON and building the DataFrame again.
+# The snapshot is used only while it is newer than its JSON file; after the JSON changes it is rebuilt.
+# Parquet needs the pyarrow package — without it the data is simply parsed from JSON every time.
+def _snapshot_path(source):
+    return os.path.splitext(DATA_FILES[source])[0] + ".parquet"
+
+# Returns the DataFrame for one source ("sales" or "marketing"), from its snapshot if that is up to date.
+# raw → the JSON bytes, if the caller has already read them
+def _load_frame(source, raw=None):
+    json_path, snapshot = DATA_FILES[source], _snapshot_path(source)
+    try:
+        if os.path.getmtime(json_path) <= os.path.getmtime(snapshot):
+            return pd.read_parquet(snapshot)
+    except (OSError, ImportError, ValueError): # no snapshot yet, no parquet engine, or an unreadable file
+        pass
+
+    frame = _parse(source, _read_bytes(json_path) if raw is None else raw)
+
+    # Written to a temporary file first and then renamed, so nobody ever reads a half-written snapshot
+    try:
+        frame.to_parquet(snapshot + ".tmp", index=False)
+        os.replace(snapshot + ".tmp", snapshot)
+    except (OSError, ImportError):
+        pass
+    return frame
+
+# Returns (sales, marketing) as DataFrames
 def load_data():
     """Load sales and marketing data from JSON files"""
-    with open("data/sales_data.json", 'r') as f:
-        sales_data = json.load(f)
-    
-    with open("data/marketing_data.json", "r") as f:
-        marketing_data = json.load(f)
-    
-    return sales_data, marketing_data
+    sales_data = _load_frame("sales")
+    marketing_data = _load_frame("marketing")
 
+    return sales_data, marketing_data
 
-def create_sales_by_region_chart():
+# Chart cache: next to every PNG a small "<chart>.png.hash" file stores a fingerprint of what it was drawn from —
+# the bytes of its JSON file plus the source of this module (so a change to a chart's look also redraws it).
+# If the PNG exists and its fingerprint still matches, the chart is not drawn again.
+with open(__file__, 'rb') as _f:
+    _CODE_DIGEST = hashlib.blake2b(_f.read(), digest_size=16).digest()
+
+def _content_hash(raw):
+    return hashlib.blake2b(raw, key=_CODE_DIGEST, digest_size=16).hexdigest()
+
+def _is_cached(png, digest):
+    try:
+        with open(png + ".hash", encoding="utf-8") as f:
+            return os.path.exists(png) and f.read() == digest
+    except OSError:
+        return False
+
+def _write_hash(png, digest):
+    with open(png + ".hash", "w", encoding="utf-8") as f:
+        f.write(digest)
+
+
+# PNG settings used for every chart image:
+# compress_level=1 → the fastest zlib level. The PNG still loses no detail, the file is just a bit larger,
+# and encoding (which is most of the save time at the default level) becomes much cheaper.
+PNG_OPTIONS = {"compress_level": 1, "optimize": False}
+
+# dpi=150 → makes the images high-quality. The figure itself is created at this dpi, so what it draws
+# on its canvas already is the final image.
+CHART_DPI = 150
+
+# Saves a chart: draws the figure once on its Agg canvas and hands the finished RGBA pixels
+# straight to Pillow's PNG encoder — no savefig step in between (which changes the figure's dpi
+# and colours for the save, draws it again and then restores everything).
+def _save_png(fig, filename):
+    fig.canvas.draw()
+    Image.fromarray(np.asarray(fig.canvas.buffer_rgba())).save(filename, format="PNG", **PNG_OPTIONS)
+    return filename
+
+# All charts are drawn on ONE figure (and its Agg canvas) that is created once per process and
+# emptied between charts, instead of creating and closing a whole new figure for every chart.
+# _reset_axes() clears the figure, resizes it to figsize and returns (fig, ax) ready for the next chart.
+# layout="constrained" fits titles, labels and legends into the figure while it is drawn, so saving
+# doesn't need bbox_inches='tight' (which draws the whole chart one extra time just to measure it).
+# The axes itself is added fresh: an axes that is only .clear()-ed keeps settings from the previous
+# chart (the pie's equal aspect and hidden frame, the ROI chart's twin axis) and the images come out different.
+_FIG = None
+_AX = None
+
+def _reset_axes(figsize):
+    global _FIG, _AX
+    if _FIG is None:
+        _FIG, _AX = plt.subplots(figsize=figsize, dpi=CHART_DPI, layout="constrained")
+        return _FIG, _AX
+
+    _FIG.clear()
+    _FIG.set_size_inches(figsize)
+    _AX = _FIG.add_subplot()
+    return _FIG, _AX
+
+# Marks the big filled shapes of a chart (bars, pie slices, shaded areas) as "rasterized".
+# PNG output looks exactly the same, but if a chart is ever saved as PDF/SVG these shapes are stored as one
+# embedded image (at the savefig dpi) instead of thousands of vector paths, while titles, labels and axes stay sharp vectors.
+# This matters most for the ROI chart, which draws two bars per campaign.
+def _rasterize(artists):
+    for artist in artists:
+        artist.set_rasterized(True)
+
+# The chart functions add up numbers per region / quarter / product / channel on whole columns at once,
+# instead of looping over the records in Python.
+# load_data() already returns DataFrames; this also accepts a plain list of records (e.g. from json.load)
+# and turns it into one, so the chart functions can still be called with either.
+def _as_frame(records):
+    return records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+
+# Sums one or more value columns per group ("categorical group-by"):
+#1. pd.factorize gives every distinct key a small integer code (e.g. Europe → 0, Asia → 1, ...)
+#2. np.bincount adds each value into the slot of its code — a single C loop, no hashing per row
+# sort=False keeps the groups in the order they first appear; sort=True sorts them (used for quarters).
+# Returns (group names, [one array of sums per value column]).
+def _group_sum(frame, key, value_columns, sort=False):
+    codes, uniques = pd.factorize(frame[key], sort=sort)
+    sums = [np.bincount(codes, weights=frame[col].to_numpy(), minlength=len(uniques)) for col in value_columns]
+    return uniques.tolist(), sums
+
+# The totals behind the three sales charts: each field is (group names, [one array of sums per value column]),
+# like _group_sum returns — region → [revenue], quarter → [revenue] (sorted), product → [revenue, units sold].
+SalesTotals = namedtuple("SalesTotals", ["region", "quarter", "product"])
+
+# Works out all three sales groupings together ("fused"), reading the revenue and units columns only once:
+#1. every row gets one combined code for its (region, quarter, product) — like a cell in a 3-D table
+#2. ONE np.bincount per value column adds every row into its cell
+#3. the totals per region / quarter / product are then sums over that (tiny) table, not over the rows again
+# Already computed SalesTotals are returned as they are, so the chart functions accept either.
+def _sales_totals(sales_data):
+    if isinstance(sales_data, SalesTotals):
+        return sales_data
+
+    frame = _as_frame(sales_data)
+    region_codes, regions = pd.factorize(frame["region"])
+    quarter_codes, quarters = pd.factorize(frame["quarter"], sort=True)
+    product_codes, products = pd.factorize(frame["product"])
+
+    shape = (len(regions), len(quarters), len(products))
+    cells = np.ravel_multi_index((region_codes, quarter_codes, product_codes), shape)
+    revenue, units = (np.bincount(cells, weights=frame[col].to_numpy(), minlength=np.prod(shape)).reshape(shape)
+                      for col in ("revenue", "units_sold"))
+
+    return SalesTotals(
+        region=(regions.tolist(), [revenue.sum(axis=(1, 2))]),
+        quarter=(quarters.tolist(), [revenue.sum(axis=(0, 2))]),
+        product=(products.tolist(), [revenue.sum(axis=(0, 1)), units.sum(axis=(0, 1))]),
+    )
+
+# Every create_*_chart function takes the data it needs as an argument, so generate_all_charts() can
+# read the JSON files once and hand the same data to all five charts.
+# Called on its own (without data), a chart function still loads the files itself.
+@_styled
+def create_sales_by_region_chart(sales_data=None):
     """Create sales revenue by region chart"""
-    sales_data, _ = load_data()
+    if sales_data is None:
+        sales_data, _ = load_data()
 
     # Aggregate by region
-    # For each sale in the list:
-    # 1. It reads the region (e.g., “Asia”) and the revenue (e.g., 5000).
-    # 2. It adds that revenue to the total for that region.
-    region_revenue = {}
-    for sale in sales_data:
-        region = sale["region"]
-        revenue = sale["revenue"]
-        region_revenue[region] = region_revenue.get(region, 0) + revenue
+    # _sales_totals collects the rows of each region (e.g., “Asia”) and adds up their revenue in one vectorized step.
+    # regions: list of region names (x-axis labels), in the order they first appear in the data
+    # revenues: array of total revenues (bar heights)
+    regions, (revenues,) = _sales_totals(sales_data).region
     
-    # This creates a figure (fig) and an axis (ax) — the “canvas” and “drawing area” for your chart
-    fig, ax = plt.subplots(figsize=(10, 6)) 
-    regions = list(region_revenue.keys()) # regions: list of region names (x-axis labels)
-    revenues = list(region_revenue.values()) # revenues: list of total revenues (bar heights)
+    # This gives a figure (fig) and an axis (ax) — the “canvas” and “drawing area” for your chart
+    fig, ax = _reset_axes(figsize=(10, 6))
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1'] # colors: custom colors for the bars
 
     bars = ax.bar(regions, revenues, color=colors, edgecolor='#2C3E50', linewidth=2)
-
-    # For each bar:
-    #1. Get its height (revenue value).
-    #2. Place a text label just above the bar showing the revenue in dollars (like $200,000).
-    #3. ha='center' means center horizontally, va='bottom' means just above the bar top.
-    for bar in bars:
-        height = bar.get_height()
-        # bar.get_x() → gives the x-position where the bar starts
-        # bar.get_width() → gives the width of the bar.
-        # Dividing width by 2 → moves to the middle of the bar.
-        # height → is the number (like 5000)
-        # :,.0f → means:
-        # , → add commas (like 5,000)
-        # .0f → show no decimal places
-        # $ → adds the dollar sign
-        # Example:
-        # if height = 12500.45, then f'${height:,.0f}'   # output → "$12,500"
-        # “ha” = horizontal alignment -> 'center' means center the text horizontally (so it’s in the middle of the bar)
-        # “va” = vertical alignment -> 'bottom' means place the bottom of the text just above the bar
-        ax.text((bar.get_x() + bar.get_width()/2.), height, 
-                f'${height:,.0f}',
-                ha='center', va='bottom', fontsize=12, fontweight='bold')
+    _rasterize(bars)
+
+    # Put a text label just above every bar showing its revenue in dollars (like $200,000).
+    # ax.bar_label does this for the whole bar container in one call: it centres each label
+    # on its bar and places it just above the bar top (the same spot as ha='center', va='bottom').
+    # :,.0f → means:
+    # , → add commas (like 5,000)
+    # .0f → show no decimal places
+    # $ → adds the dollar sign
+    # Example:
+    # if height = 12500.45, then f'${height:,.0f}'   # output → "$12,500"
+    ax.bar_label(bars, labels=[f'${height:,.0f}' for height in revenues], fontsize=12, fontweight='bold')
 
     # Adds a title and axis labels with font size and bold style.  
     ax.set_title('Sales Revenue by Region', fontsize=20, fontweight='bold', pad=20)
@@ -74,32 +276,25 @@ def create_sales_by_region_chart():
 
     # This formats the y-axis numbers to look like money.
     # Example: 100000 → $100,000
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    ax.yaxis.set_major_formatter(_DOLLAR_FMT)
 
-    plt.tight_layout() # adjusts spacing so nothing overlaps.
 
     # saves the chart as an image file.
-    # dpi=150 -> makes it high-quality
-    plt.savefig('sales_by_region.png', dpi=150, bbox_inches='tight') 
-    plt.close() # clears the chart from memory
+    # (at CHART_DPI=150 -> makes it high-quality)
+    _save_png(fig, 'sales_by_region.png')
 
     return "sales_by_region.png"
 
-def create_quarterly_performance_chart():
+@_styled
+def create_quarterly_performance_chart(sales_data=None):
     """Create quarterly sales performance chart"""
-    sales_data, _ = load_data()
-
-    # Aggregate by quarter
-    quarter_revenue = {}
-    for sale in sales_data:
-        quarter = sale["quarter"]
-        revenue = sale["revenue"]
-        quarter_revenue[quarter] = quarter_revenue.get(quarter, 0) + revenue
-    
-    quarters = sorted(quarter_revenue.keys())
-    revenues = [quarter_revenue[q] for q in quarters]
+    if sales_data is None:
+        sales_data, _ = load_data()
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    # Aggregate by quarter (sorted: Q1 2023, Q2 2023, ...)
+    quarters, (revenues,) = _sales_totals(sales_data).quarter
+
+    fig, ax = _reset_axes(figsize=(10, 6))
 
     # Plots a line connecting the points (Q1 → Q2 → Q3 → Q4)
     # marker='o' → puts circles on each point
@@ -111,88 +306,105 @@ def create_quarterly_performance_chart():
             markeredgewidth=2)
     
     # This adds a light blue shading below the line to make it look more stylish and clear.
-    ax.fill_between(quarters, revenues, alpha=0.3, color='#3498DB')
+    _rasterize([ax.fill_between(quarters, revenues, alpha=0.3, color='#3498DB')])
 
+    # Each value label sits a fixed distance (3% of the highest quarter) above its point;
+    # that distance is worked out once instead of once per label.
+    offset = revenues.max() * 0.03
     for x, y in zip(quarters, revenues):
-        ax.text(x, (y + max(revenues)*0.03), f'${y:,.0f}', ha='center', fontsize=11, fontweight='bold')
+        ax.text(x, y + offset, f'${y:,.0f}', ha='center', fontsize=11, fontweight='bold')
     
     ax.set_title('Quarterly Sales Performance', fontsize=20, fontweight='bold', pad=20)
     ax.set_xlabel('Quarter', fontsize=14, fontweight='bold')
     ax.set_ylabel('Revenue ($)', fontsize=14, fontweight='bold')
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    ax.yaxis.set_major_formatter(_DOLLAR_FMT)
     ax.grid(True, alpha=0.3) # Adds light grid lines
 
-    plt.tight_layout() # Adjusts layout
-    plt.savefig('quarterly_performance.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_png(fig, 'quarterly_performance.png')
 
     return "quarterly_performance.png"
 
 # The goal of this function is to visualize how each product is performing in terms of total revenue.
 # It generates a pie chart and saves it as product_performance.png
-def create_product_performance_chart():
+@_styled
+def create_product_performance_chart(sales_data=None):
     """Create product performance chart"""
-    sales_data, _ = load_data()
+    if sales_data is None:
+        sales_data, _ = load_data()
 
     # Aggregate by product
-    # This loop collects total revenue and total units sold for each product.
-    product_data = {}
-    for sale in sales_data:
-        product = sale["product"]
-        if product not in product_data:
-            product_data[product] = {'revenue':0, 'units':0}
-        product_data[product]["revenue"] +=sale["revenue"]
-        product_data[product]["units"] +=sale["units_sold"]
-    
-    products = list(product_data.keys())
-    revenues = [product_data[q]["revenue"] for q in products]
+    # Total revenue and total units sold for each product.
+    products, (revenues, units) = _sales_totals(sales_data).product
 
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig, ax = _reset_axes(figsize=(10, 8))
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
 
-    # revenues → sizes of the pie slices
-    # labels=products → names beside each slice
-    # autopct='%1.1f%%' → shows percentage values like 25.0%
-    # startangle=90 → starts the first slice at the top
-    # wedgeprops → adds a white border between slices
-    wedges, texts, autotexts = ax.pie(revenues, labels=products, colors=colors, autopct='%1.1f%%', startangle=90,
-                                    textprops={'fontsize': 11, 'fontweight': 'bold'},
-                                    wedgeprops={'edgecolor': 'white', 'linewidth': 2})
-    
-    # Make percentage text white
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontsize(12)
-        autotext.set_fontweight('bold')
+    # The pie is built from its parts directly instead of with ax.pie:
+    # all slice angles come from one NumPy cumulative sum, and the slices are drawn together
+    # as ONE PatchCollection (a single draw call) instead of one patch per slice.
+    # fracs → each product's share of the total revenue (the slice sizes)
+    # edges → where each slice starts/ends in degrees; starting at 90° puts the first slice at the top,
+    #         and the slices follow counter-clockwise
+    fracs = revenues / revenues.sum()
+    edges = 90 + 360 * np.concatenate(([0], np.cumsum(fracs)))
+    middles = np.deg2rad((edges[:-1] + edges[1:]) / 2) # the angle through the middle of each slice
+
+    # One wedge per product; the colours repeat when there are more products than colours.
+    # edgecolor/linewidth → adds a white border between slices
+    wedges = [mpatches.Wedge((0, 0), 1, start, end, facecolor=colors[i % len(colors)], edgecolor='white', linewidth=2)
+              for i, (start, end) in enumerate(zip(edges[:-1], edges[1:]))]
+    slices = mcollections.PatchCollection(wedges, match_original=True, clip_on=False)
+    ax.add_collection(slices)
+    _rasterize([slices])
+
+    # Product names just outside each slice (1.1× the radius), left- or right-aligned
+    # depending on the side of the pie, and the percentage (like 25.0%) in white inside it (0.6× the radius)
+    for product, frac, angle in zip(products, fracs, middles):
+        x, y = np.cos(angle), np.sin(angle)
+        ax.text(1.1 * x, 1.1 * y, product, ha='left' if x > 0 else 'right', va='center',
+                fontsize=11, fontweight='bold', clip_on=False)
+        ax.text(0.6 * x, 0.6 * y, f'{100 * frac:.1f}%', ha='center', va='center',
+                color='white', fontsize=12, fontweight='bold', clip_on=False)
+
+    # A round pie with no frame or ticks around it (what ax.pie sets up by itself)
+    ax.set_aspect('equal')
+    ax.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.25))
     
     # Adds a bold title above the chart
     ax.set_title('Product Revenue Distribution', fontsize=20, fontweight='bold', pad=20)
 
     # Add legend with revenue values
     legend_labels = [f'{p}: ${r:,.0f}' for p, r in zip(products, revenues)]
-    ax.legend(legend_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1), fontsize=10)
+    ax.legend(wedges, legend_labels, loc='center left', bbox_to_anchor=(1, 0, 0.5, 1), fontsize=10)
 
-    plt.tight_layout()
-    plt.savefig('product_performance.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    # The slice labels sit outside the axes, where the constrained layout doesn't look,
+    # so this chart alone keeps bbox_inches='tight' to grow the image around them.
+    fig.savefig('product_performance.png', dpi=CHART_DPI, bbox_inches='tight', pil_kwargs=PNG_OPTIONS)
 
     return "product_performance.png"
 
 # This function’s goal is to show — For each marketing campaign, how much money was spent (budget) and how many conversions (customers, signups, etc.) were achieved.
 # It produces a side-by-side bar chart and saves it as marketing_roi.png
-def create_marketing_roi_chart():
+@_styled
+def create_marketing_roi_chart(marketing_data=None):
     """Create marketing ROI chart"""
-    _, marketing_data = load_data()
+    if marketing_data is None:
+        _, marketing_data = load_data()
     
-    # campaigns → Names of campaigns (first 25 characters only to avoid long names)
+    # campaigns → Names of campaigns (first 25 characters only to avoid long names, precomputed by load_data)
     # budgets → How much was spent on each campaign
     # conversions → How many results (sales, signups, etc.) came from each
-    campaigns = [m["campaign_name"][:25] for m in marketing_data]
-    budgets = [m["budget"] for m in marketing_data]
-    conversions = [m["conversions"] for m in marketing_data]
-    
-    # Creates a 12×6 inch figure and a main axis called ax1 (for the Budget bars)
-    fig, ax1 = plt.subplots(figsize=(12, 6))
+    # The two number columns are taken as typed NumPy arrays, which is what ax.bar works on anyway.
+    frame = _as_frame(marketing_data)
+    if "campaign_short" in frame:
+        campaigns = frame["campaign_short"].tolist()
+    else: # plain records passed in, not from load_data()
+        campaigns = frame["campaign_name"].str.slice(0, 25).tolist()
+    budgets = frame["budget"].to_numpy(dtype=np.float64)
+    conversions = frame["conversions"].to_numpy(dtype=np.int64)
+    
+    # A 12×6 inch figure and a main axis called ax1 (for the Budget bars)
+    fig, ax1 = _reset_axes(figsize=(12, 6))
     
     # If there are 3 campaigns, x becomes [0, 1, 2]
     # width = 0.35 means each bar is 0.35 units wide — this helps us place them side by side
@@ -203,11 +415,11 @@ def create_marketing_roi_chart():
     # x - width/2 shifts the blue bar to the left side of the center position
     # Each bar’s height = budget amount
     # edgecolor and linewidth make the bars have a black border
-    ax1.bar(x - width/2, budgets, width, label='Budget', color='#3498DB', edgecolor='black', linewidth=1.5)
+    _rasterize(ax1.bar(x - width/2, budgets, width, label='Budget', color='#3498DB', edgecolor='black', linewidth=1.5))
     ax1.set_xlabel('Campaign', fontsize=14, fontweight='bold')
     ax1.set_ylabel('Budget ($)', fontsize=14, fontweight='bold', color='#3498DB')
     ax1.tick_params(axis='y', labelcolor='#3498DB')
-    ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
+    ax1.yaxis.set_major_formatter(_DOLLAR_FMT)
     
     # ax1.twinx() creates another Y-axis on the right side of the same chart
     # This allows showing different scales — e.g. one side for dollars, one for conversions.
@@ -217,7 +429,7 @@ def create_marketing_roi_chart():
     # So for each campaign:
     #1. Blue bar (Budget)
     #2. Green bar (Conversions)
-    ax2.bar((x + width/2), conversions, width, label='Conversions', color='#2ECC71', edgecolor='black', linewidth=1.5)
+    _rasterize(ax2.bar((x + width/2), conversions, width, label='Conversions', color='#2ECC71', edgecolor='black', linewidth=1.5))
     ax2.set_ylabel('Conversions', fontsize=14, fontweight='bold', color='#2ECC71')
     ax2.tick_params(axis='y', labelcolor='#2ECC71')
     
@@ -233,86 +445,99 @@ def create_marketing_roi_chart():
     ax1.legend(loc='upper left', fontsize=11)
     ax2.legend(loc='upper right', fontsize=11)
     
-    plt.tight_layout()
-    plt.savefig('marketing_roi.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_png(fig, 'marketing_roi.png')
     
     return "marketing_roi.png"
 
 
-def create_channel_performance_chart():
+@_styled
+def create_channel_performance_chart(marketing_data=None):
     """Create marketing channel performance chart"""
-    _, marketing_data = load_data()
+    if marketing_data is None:
+        _, marketing_data = load_data()
     
     # Aggregate by channel
-    channel_data = {}
-    for campaign in marketing_data:
-        channel = campaign["channel"]
-        if channel not in channel_data:
-            channel_data[channel] = {
-                "budget": 0,
-                "impressions": 0,
-                "clicks": 0,
-                "conversions": 0
-            }
-        channel_data[channel]["budget"] += campaign["budget"]
-        channel_data[channel]["impressions"] += campaign["impressions"]
-        channel_data[channel]["clicks"] += campaign["clicks"]
-        channel_data[channel]["conversions"] += campaign["conversions"]
-    
-    channels = list(channel_data.keys())
-    conversions = [channel_data[c]["conversions"] for c in channels]
+    channels, (conversions,) = _group_sum(_as_frame(marketing_data), "channel", ["conversions"])
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _reset_axes(figsize=(10, 6))
     
     colors = plt.cm.viridis(np.linspace(0, 1, len(channels)))
     bars = ax.bar(channels, conversions, color=colors, edgecolor='#2C3E50', linewidth=2)
+    _rasterize(bars)
     
-    # Add value labels
-    for bar in bars:
-        height = bar.get_height()
-        ax.text((bar.get_x() + bar.get_width()/2.), height,
-                f'{int(height)}',
-                ha='center', va='bottom', fontsize=12, fontweight='bold')
+    # Add value labels (one call for all bars, see create_sales_by_region_chart)
+    ax.bar_label(bars, labels=[f'{int(height)}' for height in conversions], fontsize=12, fontweight='bold')
     
     ax.set_title('Conversions by Marketing Channel', fontsize=20, fontweight='bold', pad=20)
     ax.set_xlabel('Channel', fontsize=14, fontweight='bold')
     ax.set_ylabel('Total Conversions', fontsize=14, fontweight='bold')
     ax.set_xticklabels(channels, rotation=20, ha='right')
     
-    plt.tight_layout()
-    plt.savefig('channel_performance.png', dpi=150, bbox_inches='tight')
-    plt.close()
+    _save_png(fig, 'channel_performance.png')
     
     return "channel_performance.png"
 
-def generate_all_charts():
+# The five charts: (label, chart function, which data it needs, the PNG it writes)
+CHART_BUILDERS = [
+    ("Sales by Region", create_sales_by_region_chart, "sales", "sales_by_region.png"),
+    ("Quarterly Performance", create_quarterly_performance_chart, "sales", "quarterly_performance.png"),
+    ("Product Performance", create_product_performance_chart, "sales", "product_performance.png"),
+    ("Marketing ROI", create_marketing_roi_chart, "marketing", "marketing_roi.png"),
+    ("Channel Performance", create_channel_performance_chart, "marketing", "channel_performance.png"),
+]
+
+# By default the charts are drawn one after another in this process. That is what the scheduler uses:
+# a worker process would have to start a new Python (and, on Windows, re-import the whole program,
+# including AutoGen and ChromaDB), which costs more than the five small charts take to draw.
+# parallel=True builds each chart in its own worker process, on separate CPU cores at the same time
+# (processes, not threads: matplotlib is not thread-safe, and threads would share one CPU core because of the GIL).
+# It is only used when this file is run directly, so the workers import only this lightweight module;
+# "spawn" starts them as fresh processes on every OS, so they never inherit locks held by other threads (as "fork" can),
+# and with a single CPU core the charts are drawn in-process anyway.
+# The JSON is read once here and the data is handed to each chart (a copy of it to each worker).
+# Charts whose data hasn't changed since they were last drawn are reused as they are (see _is_cached).
+def generate_all_charts(parallel=False):
     """Generate all visualization charts"""
     print("\n" + "="*80)
     print("GENERATING VISUALIZATIONS")
     print("="*80)
-    
+
+    # Read both JSON files once and fingerprint them
+    raw = {source: _read_bytes(path) for source, path in DATA_FILES.items()}
+    digests = {source: _content_hash(content) for source, content in raw.items()}
+
+    # Only the charts that are missing or out of date are drawn; only the data they need is loaded
+    stale = [(builder, source, png) for _, builder, source, png in CHART_BUILDERS if not _is_cached(png, digests[source])]
+    data = {source: _load_frame(source, raw[source]) for source in {source for _, source, _ in stale}}
+
+    # The three sales charts share one fused aggregation (see _sales_totals), worked out here once;
+    # the charts (or workers) then get just these few totals instead of every sales record.
+    if "sales" in data:
+        data["sales"] = _sales_totals(data["sales"])
+
+    workers = min(len(stale), os.cpu_count() or 1)
+    parallel = parallel and workers > 1
+    print(f"\nCreating {len(stale)} of {len(CHART_BUILDERS)} charts{' in parallel' if parallel else ''}...")
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {png: executor.submit(builder, data[source]) for builder, source, png in stale}
+            built = {png: future.result() for png, future in futures.items()}
+    else:
+        built = {png: builder(data[source]) for builder, source, png in stale}
+
+    # Results are collected in the fixed chart order, so the email/Telegram order never changes.
+    # The fingerprint is written only after the chart was saved successfully.
     charts = []
-    
-    print("\n[1/5] Creating Sales by Region chart...")
-    charts.append(create_sales_by_region_chart())
-    print("✓ sales_by_region.png")
-    
-    print("\n[2/5] Creating Quarterly Performance chart...")
-    charts.append(create_quarterly_performance_chart())
-    print("✓ quarterly_performance.png")
-    
-    print("\n[3/5] Creating Product Performance chart...")
-    charts.append(create_product_performance_chart())
-    print("✓ product_performance.png")
-    
-    print("\n[4/5] Creating Marketing ROI chart...")
-    charts.append(create_marketing_roi_chart())
-    print("✓ marketing_roi.png")
-    
-    print("\n[5/5] Creating Channel Performance chart...")
-    charts.append(create_channel_performance_chart())
-    print("✓ channel_performance.png")
+    for i, (label, _, source, png) in enumerate(CHART_BUILDERS, start=1):
+        if png in built:
+            chart = built[png]
+            _write_hash(chart, digests[source])
+            note = ""
+        else:
+            chart = png
+            note = " (unchanged, reused)"
+        charts.append(chart)
+        print(f"✓ [{i}/{len(CHART_BUILDERS)}] {label}: {chart}{note}")
     
     print("\n" + "="*80)
     print("ALL VISUALIZATIONS GENERATED!")
@@ -321,7 +546,7 @@ def generate_all_charts():
     return charts
 
 if __name__ == "__main__":
-    generate_all_charts()
+    generate_all_charts(parallel=True)
 
 
 